@@ -1,34 +1,77 @@
+import io
 import os
 import json
 import re
+import hashlib
 import subprocess
 import tempfile
-import requests
 import uuid
 import datetime
-from flask import Flask, jsonify, abort, request
+import time
+import logging
+import threading
+import click
+from flask import Flask, jsonify, abort, request, stream_with_context, send_file, g
 from flask_cors import CORS
 from dotenv import load_dotenv
-import logging # ADDED BY GEMINI
 
 load_dotenv()
 
+from judging import judge_cases
+from executors import get_executor
+from rejudge import RejudgeJob
+from case_pack import case_digests, pack_path, read_pack, write_pack
+from submission_queue import SubmissionQueue, PENDING_STATUSES
+from submission_store import get_store, import_json_submissions, compact_results
+from problem_cache import problem_cache, file_fingerprint, tree_fingerprint, cached_file, parse_json_or_empty
+from catalog import Catalog
+from verdict_cache import verdict_cache
+from logging_setup import configure_logging, submission_context, log_event
+from compression import compress_response, precompress, use_precompressed
+from metrics import collect_timings, stage_timer, render as render_metrics, Gauge, HTTP_REQUEST_SECONDS, CASES_JUDGED
+
 app = Flask(__name__)
-CORS(app)
-
-# Configure logging # ADDED BY GEMINI
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("local_server.log"),
-        logging.StreamHandler()
-    ]
-)
-# END ADDED BY GEMINI
+CORS(app, expose_headers=['ETag', 'X-Total-Count', 'Content-Range', 'Accept-Ranges'])
+
+configure_logging()
+logger = logging.getLogger(__name__)
+
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def record_request_latency(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, method=request.method, route=route,
+                                     status=response.status_code)
+    return response
+
+
+@app.after_request
+def compress(response):
+    return compress_response(response, request)
+
 
 # The absolute path to the DATA directory
-DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'DATA', 'data'))
+DATA_DIR = os.path.abspath(os.getenv('DATA_DIR', os.path.join(os.path.dirname(__file__), '..', 'DATA', 'data')))
+
+# Index of the problems, contests and solutions behind the listing endpoints
+catalog = Catalog(DATA_DIR)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+MAX_TESTCASE_PREVIEW_BYTES = 1024 * 1024
+# Whether submissions store a timing breakdown by default; a submission can ask for one with "record_timings".
+SUBMISSION_TIMINGS = os.getenv('SUBMISSION_TIMINGS', '0') == '1'
+# Minimum number of seconds between two saves of a submission while it is being judged; 0 saves after every case.
+SUBMISSION_SAVE_INTERVAL = float(os.getenv('SUBMISSION_SAVE_INTERVAL', '1'))
+# Whether rendered problem pages are also kept gzip (and brotli) compressed, ready to send.
+PROBLEM_DETAIL_PRECOMPRESS = os.getenv('PROBLEM_DETAIL_PRECOMPRESS', '1') == '1'
 
 def read_file_content(path):
     """Helper function to read file content."""
@@ -43,7 +86,12 @@ def clean_md_content(content):
     return content
 
 def _read_cases_from_dir(directory, dir_type):
-    """Helper to read all test cases from a directory."""
+    """Helper to read all test cases from a directory, reusing the cached copy while the files are unchanged."""
+    return problem_cache.get(('cases', directory, dir_type), tree_fingerprint(directory),
+                             lambda: _load_cases_from_dir(directory, dir_type))
+
+def _list_case_files(directory, dir_type):
+    """Helper to find the test cases in a directory without reading them."""
     cases = []
     if not os.path.isdir(directory):
         return cases
@@ -55,12 +103,8 @@ def _read_cases_from_dir(directory, dir_type):
         for case_folder in sorted(dir_items):
             case_path = os.path.join(directory, case_folder)
             if os.path.isdir(case_path):
-                input_content = clean_md_content(read_file_content(os.path.join(case_path, 'input.md')))
-                output_content = clean_md_content(read_file_content(os.path.join(case_path, 'output.md')))
                 cases.append({
                     "name": f"{dir_type}/{case_folder}",
-                    "input": input_content,
-                    "output": output_content,
                     "input_file": "input.md",
                     "output_file": "output.md",
                     "absolute_path": case_path
@@ -70,115 +114,101 @@ def _read_cases_from_dir(directory, dir_type):
         for in_file in in_files:
             name = os.path.splitext(in_file)[0]
             out_file = f"{name}.out"
-            out_path = os.path.join(directory, out_file)
-            if os.path.exists(out_path):
-                input_content = clean_md_content(read_file_content(os.path.join(directory, in_file)))
-                output_content = clean_md_content(read_file_content(out_path))
+            if os.path.exists(os.path.join(directory, out_file)):
                 cases.append({
                     "name": f"{dir_type}/{name}",
-                    "input": input_content,
-                    "output": output_content,
                     "input_file": in_file,
                     "output_file": out_file,
                     "absolute_path": directory
                 })
     return cases
 
-@app.route('/problems', methods=['GET'])
-def get_problems():
-    """Endpoint to get the list of all problems from all contests."""
-    all_problems = []
-    contests_dir = os.path.join(DATA_DIR, 'contests')
-    if not os.path.isdir(contests_dir):
-        return jsonify({"error": "contests directory not found"}), 404
-
-    for contest_id in os.listdir(contests_dir):
-        contest_path = os.path.join(contests_dir, contest_id)
-        if os.path.isdir(contest_path):
-            problems_dir = os.path.join(contest_path, 'problems')
-            if os.path.isdir(problems_dir):
-                for problem_folder in os.listdir(problems_dir):
-                    problem_path = os.path.join(problems_dir, problem_folder)
-                    if os.path.isdir(problem_path):
-                        meta_path = os.path.join(problem_path, 'meta.json')
-                        meta_content = read_file_content(meta_path)
-                        if meta_content:
-                            try:
-                                problem_details = json.loads(meta_content)
-                                all_problems.append(problem_details)
-                            except json.JSONDecodeError:
-                                continue
-
-    sorted_list = sorted(all_problems, key=lambda x: x.get('id', ''), reverse=True)
-    return jsonify(sorted_list)
-
-@app.route('/problems/<string:problem_id>', methods=['GET'])
-def get_problem_detail(problem_id):
-    """Endpoint to get the details of a single problem."""
-    match = re.match(r"C(\d+)([A-Z]+)", problem_id)
-    if not match:
-        return jsonify({"error": "Invalid problem_id format"}), 400
-    
-    contest_id_num = match.group(1)
-    problem_letter = match.group(2)
-    contest_id = f"C{contest_id_num}"
-
-    problem_dir = os.path.join(DATA_DIR, 'contests', contest_id, 'problems', problem_letter)
-    if not os.path.isdir(problem_dir):
-        return jsonify({"error": "Problem not found"}), 404
+def _load_loose_cases(directory, dir_type):
+    """Helper to load all test cases from the individual case files of a directory."""
+    cases = []
+    for case in _list_case_files(directory, dir_type):
+        input_content = clean_md_content(read_file_content(os.path.join(case['absolute_path'], case['input_file'])))
+        output_content = clean_md_content(read_file_content(os.path.join(case['absolute_path'], case['output_file'])))
+        cases.append(dict(case, input=input_content, output=output_content,
+                          **case_digests(input_content, output_content)))
+    return cases
 
-    def get_content_with_path(file_path):
-        content = read_file_content(file_path)
-        return {"content": content, "file_path": file_path if content else None}
+def _load_cases_from_dir(directory, dir_type):
+    """Helper to load all test cases from a directory, from its cases.pack when that is up to date."""
+    path = pack_path(directory)
+    if path is not None:
+        try:
+            return read_pack(path, directory)
+        except (ValueError, OSError) as e:
+            log_event(logger, 'case_pack_unreadable', level=logging.WARNING, path=path, error=str(e))
+    return _load_loose_cases(directory, dir_type)
 
-    def parse_problem_md(problem_md_content):
-        sections = {
-            'description': '',
-            'input': '',
-            'output': '',
-            'constraints': '',
-            'notes': ''
-        }
-        if not problem_md_content:
-            return sections
-
-        lines = problem_md_content.split('\n')
-        current_section = None
-        for line in lines:
-            if line.startswith('## '):
-                section_name = line[3:].strip().lower().replace(' ', '_')
-                if section_name in sections:
-                    current_section = section_name
-                else:
-                    current_section = None
-            elif current_section:
-                sections[current_section] += line + '\n'
-        
-        for section in sections:
-            sections[section] = sections[section].strip()
+def _testcase_bytes(path):
+    """Helper to get the served content of a markdown case file, which is sent without its code fence.
 
+    Returns None for plain .in/.out files, which are streamed from disk as they are.
+    """
+    if not path.endswith('.md'):
+        return None
+    return (clean_md_content(read_file_content(path)) or '').encode('utf-8')
+
+def _file_digest(path):
+    """Helper to get the size and sha256 of a case file as served, reading it in chunks."""
+    content = _testcase_bytes(path)
+    if content is not None:
+        return len(content), hashlib.sha256(content).hexdigest()
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+            size += len(chunk)
+    return size, digest.hexdigest()
+
+def _load_testcase_manifest(directory, dir_type):
+    """Helper to build the manifest entries (names, sizes and hashes) of the cases in a directory."""
+    manifest = []
+    for case in _list_case_files(directory, dir_type):
+        entry = dict(case)
+        for part in ('input', 'output'):
+            size, sha256 = _file_digest(os.path.join(case['absolute_path'], case[f"{part}_file"]))
+            entry[f"{part}_size"] = size
+            entry[f"{part}_sha256"] = sha256
+        manifest.append(entry)
+    return manifest
+
+def _testcase_manifest(directory, dir_type):
+    """Helper to get the manifest of a case directory, hashing the files again only after they change."""
+    return problem_cache.get(('testcase_manifest', directory, dir_type), tree_fingerprint(directory),
+                             lambda: _load_testcase_manifest(directory, dir_type))
+
+def parse_problem_md(problem_md_content):
+    """Splits problem.md into its known "## " sections."""
+    sections = {
+        'description': '',
+        'input': '',
+        'output': '',
+        'constraints': '',
+        'notes': ''
+    }
+    if not problem_md_content:
         return sections
 
-    meta_path = os.path.join(problem_dir, 'meta.json')
-    problem_md_path = os.path.join(problem_dir, 'problem.md')
+    section_lines = {section: [] for section in sections}
+    current_lines = None
+    for line in problem_md_content.split('\n'):
+        if line.startswith('## '):
+            current_lines = section_lines.get(line[3:].strip().lower().replace(' ', '_'))
+        elif current_lines is not None:
+            current_lines.append(line)
 
-    problem_data = {}
-    
-    meta_content = read_file_content(meta_path)
-    problem_data['meta'] = {"content": json.loads(meta_content) if meta_content else {}, "file_path": meta_path}
-    
-    problem_md_content = read_file_content(problem_md_path)
-    parsed_md = parse_problem_md(problem_md_content)
+    for section, lines in section_lines.items():
+        sections[section] = '\n'.join(lines).strip()
 
-    problem_data['description'] = {"content": parsed_md.get('description'), "file_path": problem_md_path}
-    problem_data['input'] = {"content": parsed_md.get('input'), "file_path": problem_md_path}
-    problem_data['output'] = {"content": parsed_md.get('output'), "file_path": problem_md_path}
-    problem_data['constraints'] = {"content": parsed_md.get('constraints'), "file_path": problem_md_path}
-    problem_data['notes'] = {"content": parsed_md.get('notes'), "file_path": problem_md_path}
+    return sections
 
-    problem_data['absolute_path'] = problem_dir
-    
-    samples_dir = os.path.join(problem_dir, 'samples')
+def _load_samples_data(samples_dir):
+    """Helper to load the sample cases shown on the problem page."""
     samples_data = []
     if os.path.isdir(samples_dir):
         for sample_folder in sorted(os.listdir(samples_dir)):
@@ -192,9 +222,117 @@ def get_problem_detail(problem_id):
                     "output": sample_output,
                     "description": sample_desc
                 })
-    problem_data['samples_data'] = samples_data
+    return samples_data
+
+def _render_problem_detail(problem_dir):
+    """Helper to build the problem page JSON once: its body, its ETag and its precompressed variants."""
+    meta_path = os.path.join(problem_dir, 'meta.json')
+    problem_md_path = os.path.join(problem_dir, 'problem.md')
+
+    problem_data = {}
+    problem_data['meta'] = {"content": cached_file(meta_path, parse_json_or_empty), "file_path": meta_path}
+
+    parsed_md = parse_problem_md(read_file_content(problem_md_path))
+    for section in ('description', 'input', 'output', 'constraints', 'notes'):
+        problem_data[section] = {"content": parsed_md.get(section), "file_path": problem_md_path}
 
-    return jsonify(problem_data)
+    problem_data['absolute_path'] = problem_dir
+    problem_data['samples_data'] = _load_samples_data(os.path.join(problem_dir, 'samples'))
+
+    body = app.json.response(problem_data).get_data()
+    variants = precompress(body) if PROBLEM_DETAIL_PRECOMPRESS else {}
+    return body, hashlib.sha1(body).hexdigest(), variants
+
+def _problem_detail(problem_dir):
+    """Helper to get the rendered problem page, rendering it again only after meta.json, problem.md or a sample changes."""
+    fingerprint = (file_fingerprint(os.path.join(problem_dir, 'meta.json')),
+                   file_fingerprint(os.path.join(problem_dir, 'problem.md')),
+                   tree_fingerprint(os.path.join(problem_dir, 'samples')))
+    return problem_cache.get(('problem_detail', problem_dir), fingerprint, lambda: _render_problem_detail(problem_dir))
+
+def _paginate(items):
+    """Helper to apply the optional page/per_page query parameters to a listing."""
+    page = request.args.get('page', type=int)
+    per_page = request.args.get('per_page', type=int)
+    if page is None and per_page is None:
+        return items
+    page = max(1, page or 1)
+    per_page = max(1, min(per_page or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+    start = (page - 1) * per_page
+    return items[start:start + per_page]
+
+def _conditional_response(etag, build):
+    """Helper to answer 304 Not Modified when the client already has etag, and the response of build() otherwise.
+
+    build is only called when the body is needed. The comparison is weak, so the
+    weak ETag of a compressed response still matches.
+    """
+    if request.if_none_match.contains_weak(etag):
+        response = app.response_class(status=304)
+    else:
+        response = build()
+    response.set_etag(etag)
+    return response
+
+def _catalog_response(snapshot, list_items):
+    """Helper to answer a listing from the catalog with ETag and pagination support.
+
+    list_items is only called when the client does not already have this exact listing.
+    """
+    etag = hashlib.sha1(f"{snapshot.etag}?{request.query_string.decode()}".encode('utf-8')).hexdigest()
+
+    def build():
+        items = list_items()
+        response = jsonify(_paginate(items))
+        response.headers['X-Total-Count'] = str(len(items))
+        return response
+
+    return _conditional_response(etag, build)
+
+@app.route('/problems', methods=['GET'])
+def get_problems():
+    """Endpoint to get the list of all problems from all contests.
+
+    Supports filtering with ?contest=<contest_id> and ?tag=<tag>, and pagination with ?page=&per_page=.
+    """
+    snapshot = catalog.snapshot()
+    if not snapshot.contests_dir_exists:
+        return jsonify({"error": "contests directory not found"}), 404
+
+    contest_filter = request.args.get('contest')
+    tag_filter = request.args.get('tag', '').lower()
+
+    def list_problems():
+        return [
+            meta for contest_id, meta in snapshot.problems
+            if (not contest_filter or contest_id == contest_filter)
+            and (not tag_filter or tag_filter in [str(tag).lower() for tag in meta.get('tags') or []])
+        ]
+
+    return _catalog_response(snapshot, list_problems)
+
+@app.route('/problems/<string:problem_id>', methods=['GET'])
+def get_problem_detail(problem_id):
+    """Endpoint to get the details of a single problem.
+
+    The response is rendered (and compressed) once per change of the problem's files
+    and carries an ETag for conditional requests.
+    """
+    match = re.match(r"C(\d+)([A-Z]+)", problem_id)
+    if not match:
+        return jsonify({"error": "Invalid problem_id format"}), 400
+    
+    contest_id_num = match.group(1)
+    problem_letter = match.group(2)
+    contest_id = f"C{contest_id_num}"
+
+    problem_dir = os.path.join(DATA_DIR, 'contests', contest_id, 'problems', problem_letter)
+    if not os.path.isdir(problem_dir):
+        return jsonify({"error": "Problem not found"}), 404
+
+    body, etag, variants = _problem_detail(problem_dir)
+    response = _conditional_response(etag, lambda: app.response_class(body, mimetype='application/json'))
+    return use_precompressed(response, variants, request)
 
 @app.route('/solutions/<string:problem_id>', methods=['GET'])
 def get_solution(problem_id):
@@ -224,36 +362,18 @@ def get_solution(problem_id):
 @app.route('/solutions', methods=['GET'])
 def get_solutions():
     """Endpoint to get the list of all available solutions."""
-    solutions_dir = os.path.join(DATA_DIR, 'solutions')
-    if not os.path.isdir(solutions_dir):
+    snapshot = catalog.snapshot()
+    if not snapshot.solutions_dir_exists:
         return jsonify({"error": "solutions directory not found"}), 404
-    
-    available_solutions = [d for d in os.listdir(solutions_dir) if os.path.isdir(os.path.join(solutions_dir, d))]
-    sorted_solutions = sorted(available_solutions, key=lambda x: x, reverse=True)
-    return jsonify(sorted_solutions)
+    return _catalog_response(snapshot, lambda: snapshot.solutions)
 
 @app.route('/contests', methods=['GET'])
 def get_contests():
     """Endpoint to get the list of all contests."""
-    contests_dir = os.path.join(DATA_DIR, 'contests')
-    if not os.path.isdir(contests_dir):
+    snapshot = catalog.snapshot()
+    if not snapshot.contests_dir_exists:
         return jsonify({"error": "contests directory not found"}), 404
-    
-    all_contests = []
-    for contest_id in os.listdir(contests_dir):
-        contest_path = os.path.join(contests_dir, contest_id)
-        if os.path.isdir(contest_path):
-            meta_path = os.path.join(contest_path, 'meta.json')
-            meta_content = read_file_content(meta_path)
-            if meta_content:
-                try:
-                    contest_details = json.loads(meta_content)
-                    all_contests.append(contest_details)
-                except json.JSONDecodeError:
-                    continue
-
-    sorted_data = sorted(all_contests, key=lambda x: x.get('id', ''), reverse=True)
-    return jsonify(sorted_data)
+    return _catalog_response(snapshot, lambda: snapshot.contests)
 
 @app.route('/contests/<string:contest_id>', methods=['GET'])
 def get_contest_detail(contest_id):
@@ -285,7 +405,12 @@ def get_contest_detail(contest_id):
 
 @app.route('/problems/<string:problem_id>/testcases', methods=['GET'])
 def get_testcases(problem_id):
-    """Endpoint to get the testcases for a single problem."""
+    """Endpoint to get the manifest of the testcases of a single problem.
+
+    Every case is listed with the names, sizes and sha256 hashes of its files; the
+    contents are fetched one case at a time from /problems/<problem_id>/testcases/<case_name>/<input|output>.
+    ?page=&per_page= paginate the normal cases, and ?full=1 returns every case with its contents inline.
+    """
     match = re.match(r"C(\d+)([A-Z]+)", problem_id)
     if not match:
         return jsonify({"error": "Invalid problem_id format"}), 400
@@ -301,12 +426,68 @@ def get_testcases(problem_id):
     samples_dir = os.path.join(problem_dir, 'samples')
     testcases_dir = os.path.join(problem_dir, 'testcases')
 
-    response_data = {
-        "sample_cases": _read_cases_from_dir(samples_dir, 'samples'),
-        "normal_cases": _read_cases_from_dir(testcases_dir, 'testcases')
-    }
+    if request.args.get('full') == '1':
+        return jsonify({
+            "sample_cases": _read_cases_from_dir(samples_dir, 'samples'),
+            "normal_cases": _read_cases_from_dir(testcases_dir, 'testcases')
+        })
+
+    normal_cases = _testcase_manifest(testcases_dir, 'testcases')
+    response = jsonify({
+        "sample_cases": _testcase_manifest(samples_dir, 'samples'),
+        "normal_cases": _paginate(normal_cases)
+    })
+    response.headers['X-Total-Count'] = str(len(normal_cases))
+    response.add_etag()
+    return response.make_conditional(request)
+
+
+@app.route('/problems/<string:problem_id>/testcases/<string:dir_type>/<string:case_folder>/<string:part>',
+           methods=['GET'])
+def get_testcase_file(problem_id, dir_type, case_folder, part):
+    """Endpoint to stream the input or output of a single test case from disk.
+
+    HTTP Range requests are supported, so large files can be read piece by piece.
+    ?preview=<bytes> returns JSON with at most that many bytes of the content instead.
+    """
+    match = re.match(r"C(\d+)([A-Z]+)", problem_id)
+    if not match:
+        return jsonify({"error": "Invalid problem_id format"}), 400
+    if dir_type not in ('samples', 'testcases') or part not in ('input', 'output'):
+        return jsonify({"error": "Test case not found"}), 404
+
+    problem_dir = os.path.join(DATA_DIR, 'contests', f"C{match.group(1)}", 'problems', match.group(2))
+    manifest = _testcase_manifest(os.path.join(problem_dir, dir_type), dir_type)
+    case = next((c for c in manifest if c['name'] == f"{dir_type}/{case_folder}"), None)
+    if case is None:
+        return jsonify({"error": "Test case not found"}), 404
+
+    path = os.path.join(case['absolute_path'], case[f"{part}_file"])
+    content = _testcase_bytes(path)
+    preview = request.args.get('preview', type=int)
+    if preview is not None:
+        preview = max(0, min(preview, MAX_TESTCASE_PREVIEW_BYTES))
+        if content is None:
+            with open(path, 'rb') as f:
+                head = f.read(preview)
+        else:
+            head = content[:preview]
+        return jsonify({
+            "name": case['name'],
+            "part": part,
+            "size": case[f"{part}_size"],
+            "sha256": case[f"{part}_sha256"],
+            "truncated": case[f"{part}_size"] > len(head),
+            "content": head.decode('utf-8', errors='ignore')
+        })
 
-    return jsonify(response_data)
+    if content is None:
+        response = send_file(path, mimetype='text/plain', conditional=True, etag=case[f"{part}_sha256"])
+    else:
+        response = send_file(io.BytesIO(content), mimetype='text/plain', conditional=True,
+                             etag=case[f"{part}_sha256"], last_modified=os.path.getmtime(path))
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 
 @app.route('/problems/<string:problem_id>/contests', methods=['GET'])
@@ -335,9 +516,99 @@ def get_problem_contests(problem_id):
     return jsonify([])
 
 
+def _judge_submission(submission_data):
+    """Judges a queued submission, saving its progress after every case."""
+    record_timings = submission_data.get('record_timings', SUBMISSION_TIMINGS)
+    with submission_context(submission_data['id'], payloads=submission_data.get('debug_payloads', False)), \
+            collect_timings(enabled=record_timings) as timings:
+        _judge_submission_cases(submission_data, timings)
+
+
+def _problem_cases(problem_id):
+    """Helper to get the directory and all the cases (samples first) a problem is judged with, or None."""
+    match = re.match(r"C(\d+)([A-Z]+)", problem_id)
+    if not match:
+        return None
+    problem_dir = os.path.join(DATA_DIR, 'contests', f"C{match.group(1)}", 'problems', match.group(2))
+    if not os.path.isdir(problem_dir):
+        return None
+
+    with stage_timer('read_cases'):
+        sample_cases = _read_cases_from_dir(os.path.join(problem_dir, 'samples'), 'samples')
+        normal_cases = _read_cases_from_dir(os.path.join(problem_dir, 'testcases'), 'testcases')
+    return problem_dir, sample_cases + normal_cases
+
+
+def _judge_submission_cases(submission_data, timings):
+    problem_id = submission_data['problem_id']
+    problem = _problem_cases(problem_id)
+    if problem is None:
+        raise ValueError(f"Problem {problem_id} not found")
+    problem_dir, all_cases = problem
+
+    # Keep the verdicts of cases judged before a restart and only judge the rest.
+    previous_results = {r['case']: r for r in submission_data.get('results', []) if r.get('status') != 'Pending'}
+    results = [previous_results.get(case['name'], {"case": case['name'], "status": "Pending", "stdout": "", "stderr": ""})
+               for case in all_cases]
+    pending_indexes = [i for i, case in enumerate(all_cases) if case['name'] not in previous_results]
+
+    submission_data['status'] = 'running'
+    submission_data['results'] = results
+    get_store().save(submission_data)
+    start = time.perf_counter()
+    log_event(logger, 'judging_started', problem_id=problem_id, language=submission_data['language'],
+              cases=len(all_cases), pending_cases=len(pending_indexes), code_bytes=len(submission_data['code']))
+
+    # Every save rewrites the whole submission, so while judging it is only saved as a checkpoint for a restart
+    # every SUBMISSION_SAVE_INTERVAL seconds. Progress is read from the queue's copy, which is always current.
+    last_saved = [time.monotonic()]
+
+    def on_result(index, result):
+        results[pending_indexes[index]] = result
+        CASES_JUDGED.inc(status=result['status'], cached=bool(result.get('cached')))
+        if time.monotonic() - last_saved[0] >= SUBMISSION_SAVE_INTERVAL:
+            with stage_timer('store_write'):
+                get_store().save(submission_data)
+            last_saved[0] = time.monotonic()
+        submission_queue.notify_progress()
+
+    pending_cases = [all_cases[i] for i in pending_indexes]
+    with stage_timer('judge'):
+        judge_cases(pending_cases, submission_data['code'], submission_data['language'], problem_dir,
+                    on_result=on_result, stop_on_failure=submission_data.get('stop_on_first_failure', False),
+                    use_cache=not submission_data.get('force_rejudge', False))
+
+    if timings is not None:
+        submission_data['timings'] = dict(timings.as_dict(), total_ms=round((time.perf_counter() - start) * 1000, 3))
+    submission_data['status'] = 'finished'
+    with stage_timer('store_write'):
+        get_store().save(submission_data)
+    verdicts = {}
+    for result in results:
+        verdicts[result['status']] = verdicts.get(result['status'], 0) + 1
+    log_event(logger, 'judging_finished', problem_id=problem_id, verdicts=verdicts,
+              duration_ms=round((time.perf_counter() - start) * 1000, 2))
+
+
+submission_queue = SubmissionQueue(_judge_submission)
+Gauge('submission_queue_active', 'Submissions queued or being judged by this process.', submission_queue.active_count)
+
+# Rejudge jobs started by this process, by id.
+rejudge_jobs = {}
+rejudge_jobs_lock = threading.Lock()
+
+
 @app.route('/problems/<string:problem_id>/submit', methods=['POST'])
 def submit_solution(problem_id):
-    """Endpoint to submit a solution for a problem."""
+    """Endpoint to submit a solution for a problem.
+
+    The submission is queued for judging and its id is returned right away; poll
+    /submissions/<submission_id>/status or follow /submissions/<submission_id>/events
+    for progress. An optional "stop_on_first_failure" flag overrides the problem's
+    meta.json setting of the same name, and "force_rejudge" bypasses the verdict cache.
+    "debug_payloads" logs the full judge requests and responses of this submission only, and
+    "record_timings" stores a per-stage and per-case timing breakdown with the results.
+    """
     data = request.get_json()
     if not data or 'code' not in data or 'language' not in data:
         return jsonify({"error": "Missing code or language in request"}), 400
@@ -360,80 +631,10 @@ def submit_solution(problem_id):
     if not os.path.isdir(problem_dir):
         return jsonify({"error": "Problem not found"}), 404
 
-    samples_dir = os.path.join(problem_dir, 'samples')
-    testcases_dir = os.path.join(problem_dir, 'testcases')
-
-    sample_cases = _read_cases_from_dir(samples_dir, 'samples')
-    normal_cases = _read_cases_from_dir(testcases_dir, 'testcases')
-    all_cases = sample_cases + normal_cases
-
-    judge_service_url = os.getenv('JUDGE_SERVICE_URL', 'http://localhost:5002')
-    execute_endpoint = os.getenv('JUDGE_EXECUTE_ENDPOINT', '/api/execute')
-    validate_endpoint = os.getenv('JUDGE_VALIDATE_ENDPOINT', '/api/validate')
-    results = []
-
-    for case in all_cases:
-        try:
-            # 1. Execute user's code
-            execute_payload = {
-                'code': code,
-                'language': language,
-                'stdin': case['input']
-            }
-            app.logger.info(f"Sending execute payload to judge service: {execute_payload}") # CHANGED BY GEMINI
-            execute_response = requests.post(f"{judge_service_url}{execute_endpoint}", json=execute_payload)
-            app.logger.info(f"Judge service execute response status: {execute_response.status_code}") # CHANGED BY GEMINI
-            app.logger.info(f"Judge service execute response body: {execute_response.text}") # CHANGED BY GEMINI
-            execute_response.raise_for_status()
-            execution_result = execute_response.json()
-
-            if execution_result.get('error'):
-                result = {"case": case['name'], "status": "Execution Error", "stdout": "", "stderr": execution_result['error']}
-                results.append(result)
-                continue
-
-            user_output = execution_result.get('stdout', '')
-
-            # 2. Validate the output
-            validator_script_name = os.getenv('VALIDATOR_SCRIPT_NAME', 'validator.py')
-            validator_path = os.path.join(problem_dir, validator_script_name)
-
-            if not os.path.exists(validator_path):
-                # Simple diff checker
-                if user_output.strip() == case['output'].strip():
-                    status = "Accepted"
-                else:
-                    status = "Wrong Answer"
-                result = {"case": case['name'], "status": status, "stdout": user_output, "stderr": ""}
-            else:
-                with open(validator_path, 'r') as f:
-                    validator_code = f.read()
-                
-                validate_payload = {
-                    'validator_code': validator_code,
-                    'validator_language': 'python',
-                    'user_output': user_output,
-                    'test_input': case['input']
-                }
-                app.logger.info(f"Sending validate payload to judge service: {validate_payload}") # CHANGED BY GEMINI
-                validate_response = requests.post(f"{judge_service_url}{validate_endpoint}", json=validate_payload)
-                app.logger.info(f"Judge service validate response status: {validate_response.status_code}") # CHANGED BY GEMINI
-                app.logger.info(f"Judge service validate response body: {validate_response.text}") # CHANGED BY GEMINI
-                validate_response.raise_for_status()
-                validation_result = validate_response.json()
-                
-                if validation_result.get('success'):
-                    status = validation_result.get('stdout', '').strip()
-                else:
-                    status = validation_result.get('err', 'Validation Error')
-                result = {"case": case['name'], "status": status, "stdout": user_output, "stderr": validation_result.get('stderr', '')}
-
-        except requests.exceptions.RequestException as e:
-            result = {"case": case['name'], "status": "Judge Service Error", "stdout": "", "stderr": str(e)}
-        except Exception as e:
-            result = {"case": case['name'], "status": "Internal Server Error", "stdout": "", "stderr": str(e)}
-        
-        results.append(result)
+    stop_on_first_failure = data.get('stop_on_first_failure')
+    if stop_on_first_failure is None:
+        meta = cached_file(os.path.join(problem_dir, 'meta.json'), parse_json_or_empty)
+        stop_on_first_failure = meta.get('stop_on_first_failure', False)
 
     submission_id = str(uuid.uuid4())
     submission_data = {
@@ -441,62 +642,289 @@ def submit_solution(problem_id):
         'problem_id': problem_id,
         'language': language,
         'code': code,
-        'results': results,
-        'timestamp': datetime.datetime.utcnow().isoformat()
+        'results': [],
+        'timestamp': datetime.datetime.utcnow().isoformat(),
+        'stop_on_first_failure': bool(stop_on_first_failure),
+        'force_rejudge': bool(data.get('force_rejudge', False)),
+        'debug_payloads': bool(data.get('debug_payloads', False)),
+        'record_timings': bool(data.get('record_timings', SUBMISSION_TIMINGS))
     }
+    submission_queue.enqueue(submission_data)
 
-    submission_dir = os.path.join(os.path.dirname(__file__), 'submissions')
-    if not os.path.exists(submission_dir):
-        os.makedirs(submission_dir)
-
-    submission_filepath = os.path.join(submission_dir, f"{submission_id}.json")
-    with open(submission_filepath, 'w') as f:
-        json.dump(submission_data, f, indent=4)
-
-    return jsonify({"results": results, "submission_id": submission_id})
+    return jsonify({"submission_id": submission_id, "status": "queued"}), 202
 
 
-if __name__ == '__main__':
-    app.run(debug=True, port=5001)
-
 @app.route('/submissions', methods=['GET'])
 def get_submissions():
-    """Endpoint to get the list of all submissions."""
-    submission_dir = os.path.join(os.path.dirname(__file__), 'submissions')
-    if not os.path.isdir(submission_dir):
-        return jsonify([])
-
-    submissions = []
-    for filename in os.listdir(submission_dir):
-        if filename.endswith('.json'):
-            filepath = os.path.join(submission_dir, filename)
-            with open(filepath, 'r') as f:
-                try:
-                    submission_data = json.load(f)
-                    submissions.append({
-                        'id': submission_data.get('id'),
-                        'problem_id': submission_data.get('problem_id'),
-                        'language': submission_data.get('language'),
-                        'timestamp': submission_data.get('timestamp')
-                    })
-                except json.JSONDecodeError:
-                    continue
-    
-    sorted_submissions = sorted(submissions, key=lambda x: x.get('timestamp', ''), reverse=True)
-    return jsonify(sorted_submissions)
+    """Endpoint to get the list of all submissions.
+
+    Supports filtering with ?problem_id= and ?language=, and pagination with ?page=&per_page=.
+    """
+    page = request.args.get('page', type=int)
+    per_page = request.args.get('per_page', type=int)
+    offset, limit = 0, None
+    if page is not None or per_page is not None:
+        limit = max(1, min(per_page or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+        offset = (max(1, page or 1) - 1) * limit
+
+    submissions, total = get_store().list_summaries(
+        problem_id=request.args.get('problem_id'),
+        language=request.args.get('language'),
+        offset=offset,
+        limit=limit
+    )
+    response = jsonify(submissions)
+    response.headers['X-Total-Count'] = str(total)
+    return response
 
 @app.route('/submissions/<string:submission_id>', methods=['GET'])
 def get_submission_detail(submission_id):
-    """Endpoint to get the details of a single submission."""
-    submission_dir = os.path.join(os.path.dirname(__file__), 'submissions')
-    submission_filepath = os.path.join(submission_dir, f"{submission_id}.json")
+    """Endpoint to get the details of a single submission.
 
-    if not os.path.exists(submission_filepath):
+    ?outputs=0 leaves out the stdout and stderr of every case; fetch them one case at
+    a time from /submissions/<submission_id>/results/<index>.
+    """
+    try:
+        submission_data = get_store().load(submission_id)
+    except json.JSONDecodeError:
+        return jsonify({"error": "Invalid submission file"}), 500
+
+    if submission_data is None:
+        return jsonify({"error": "Submission not found"}), 404
+    if request.args.get('outputs') == '0':
+        submission_data['results'] = [
+            {key: value for key, value in result.items() if key not in ('stdout', 'stderr')}
+            for result in submission_data.get('results', [])
+        ]
+    return jsonify(submission_data)
+
+@app.route('/submissions/<string:submission_id>/results/<int:index>', methods=['GET'])
+def get_submission_result(submission_id, index):
+    """Endpoint to get the result of one case of a submission, with its (possibly truncated) stdout and stderr."""
+    try:
+        submission_data = submission_queue.get(submission_id) or get_store().load(submission_id, with_code=False)
+    except json.JSONDecodeError:
+        return jsonify({"error": "Invalid submission file"}), 500
+    if submission_data is None:
         return jsonify({"error": "Submission not found"}), 404
 
-    with open(submission_filepath, 'r') as f:
+    results = list(submission_data.get('results', []))
+    if index >= len(results):
+        return jsonify({"error": "Case not found"}), 404
+    return jsonify(dict(compact_results([results[index]])[0], index=index))
+
+@app.route('/submissions/<string:submission_id>/status', methods=['GET'])
+def get_submission_status(submission_id):
+    """Endpoint to get the judging progress of a submission."""
+    submission_data = submission_queue.get(submission_id)
+    if submission_data is None:
         try:
-            submission_data = json.load(f)
-            return jsonify(submission_data)
+            submission_data = get_store().load(submission_id, with_code=False)
         except json.JSONDecodeError:
             return jsonify({"error": "Invalid submission file"}), 500
+    if submission_data is None:
+        return jsonify({"error": "Submission not found"}), 404
+
+    results = list(submission_data.get('results', []))
+    response_data = {
+        'id': submission_data.get('id'),
+        'problem_id': submission_data.get('problem_id'),
+        # Submissions stored before the queue existed were judged synchronously.
+        'status': submission_data.get('status', 'finished'),
+        'total_cases': len(results),
+        'judged_cases': sum(1 for r in results if r.get('status') != 'Pending'),
+        'results': [{'case': r.get('case'), 'status': r.get('status')} for r in results]
+    }
+    if submission_data.get('error'):
+        response_data['error'] = submission_data['error']
+    return jsonify(response_data)
+
+@app.route('/submissions/<string:submission_id>/events', methods=['GET'])
+def get_submission_events(submission_id):
+    """Endpoint to stream the verdict of every case as Server-Sent Events while it is judged.
+
+    Each judged case is sent as a "case" event with its index in the results list,
+    followed by a single "done" event with the final submission status.
+    """
+    try:
+        submission_data = submission_queue.get(submission_id) or get_store().load(submission_id, with_code=False)
+    except json.JSONDecodeError:
+        return jsonify({"error": "Invalid submission file"}), 500
+    if submission_data is None:
+        return jsonify({"error": "Submission not found"}), 404
+
+    def generate():
+        sent = set()
+        while True:
+            live_data = submission_queue.get(submission_id)
+            current = live_data or get_store().load(submission_id, with_code=False) or {}
+            for index, result in enumerate(list(current.get('results', []))):
+                if index not in sent and result.get('status') != 'Pending':
+                    sent.add(index)
+                    yield f"event: case\ndata: {json.dumps(dict(result, index=index))}\n\n"
+            status = current.get('status', 'finished')
+            if status not in PENDING_STATUSES:
+                yield f"event: done\ndata: {json.dumps({'status': status, 'error': current.get('error')})}\n\n"
+                return
+            if live_data is not None:
+                submission_queue.wait_for_progress(timeout=1)
+            else:
+                # Judged by another server process: fall back to polling the store.
+                time.sleep(0.5)
+
+    response = app.response_class(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def _parse_timestamp(value):
+    """Helper to normalize an ISO date or datetime filter to the format submissions are stored with."""
+    if value is None:
+        return None
+    parsed = datetime.datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return parsed.isoformat()
+
+
+def _start_rejudge(filters, workers=None):
+    job = RejudgeJob(_problem_cases, problem_id=filters.get('problem_id'), language=filters.get('language'),
+                     since=_parse_timestamp(filters.get('since')), until=_parse_timestamp(filters.get('until')),
+                     workers=workers, skip=lambda sid: submission_queue.get(sid) is not None)
+    with rejudge_jobs_lock:
+        rejudge_jobs[job.id] = job
+    return job
+
+
+@app.route('/rejudge', methods=['POST'])
+def start_rejudge():
+    """Endpoint to rejudge the stored submissions matching a filter after test data or checker changes.
+
+    The body selects submissions by "problem_id", "language" and an ISO "since"/"until"
+    timestamp range; at least one of them is required. Only the cases whose data or
+    checker changed are judged again. "workers" overrides REJUDGE_WORKERS. The job runs
+    in the background; poll /rejudge/<job_id>.
+    """
+    data = request.get_json(silent=True) or {}
+    filters = {key: data.get(key) for key in ('problem_id', 'language', 'since', 'until')}
+    if not any(filters.values()):
+        return jsonify({"error": "Give at least one of problem_id, language, since or until"}), 400
+    if filters['language'] == 'cpp':
+        filters['language'] = 'c++'
+    try:
+        workers = int(data['workers']) if data.get('workers') else None
+        job = _start_rejudge(filters, workers)
+    except (TypeError, ValueError):
+        return jsonify({"error": "since and until must be ISO dates or datetimes and workers an integer"}), 400
+    job.start()
+    return jsonify({"job_id": job.id, "status": job.status}), 202
+
+@app.route('/rejudge', methods=['GET'])
+def get_rejudge_jobs():
+    """Endpoint to get the progress of every rejudge job started by this process."""
+    with rejudge_jobs_lock:
+        jobs = list(rejudge_jobs.values())
+    return jsonify([job.progress() for job in jobs])
+
+@app.route('/rejudge/<string:job_id>', methods=['GET'])
+def get_rejudge_job(job_id):
+    """Endpoint to get the progress and throughput of a rejudge job."""
+    with rejudge_jobs_lock:
+        job = rejudge_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Rejudge job not found"}), 404
+    return jsonify(job.progress())
+
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Endpoint to get the request, judging stage and judge client metrics in the Prometheus text format."""
+    return app.response_class(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """Endpoint to get the hit/miss counters of the problem and verdict caches (and the local binary cache)."""
+    stats = {
+        "problem_cache": problem_cache.stats(),
+        "verdict_cache": verdict_cache.stats()
+    }
+    executor = get_executor()
+    if hasattr(executor, 'stats'):
+        stats["binary_cache"] = executor.stats()
+    return jsonify(stats)
+
+
+@app.cli.command('import-submissions')
+def import_submissions_command():
+    """Imports the submissions/*.json files into the configured submission store."""
+    imported = import_json_submissions(get_store())
+    print(f"Imported {imported} submissions")
+
+
+@app.cli.command('rejudge')
+@click.option('--problem-id', help='Only submissions to this problem.')
+@click.option('--language', help='Only submissions in this language.')
+@click.option('--since', help='Only submissions made at or after this ISO date or datetime.')
+@click.option('--until', help='Only submissions made before this ISO date or datetime.')
+@click.option('--workers', type=int, help='Submissions rejudged at once (REJUDGE_WORKERS).')
+def rejudge_command(problem_id, language, since, until, workers):
+    """Rejudges the matching submissions in place, printing the progress as JSON lines."""
+    filters = {'problem_id': problem_id, 'language': language, 'since': since, 'until': until}
+    if not any(filters.values()):
+        raise click.UsageError('Give at least one of --problem-id, --language, --since or --until')
+    job = _start_rejudge(filters, workers)
+    last_printed = [0.0]
+
+    def on_progress(progress):
+        if time.monotonic() - last_printed[0] >= 1:
+            last_printed[0] = time.monotonic()
+            print(json.dumps(progress), flush=True)
+
+    print(json.dumps(job.run(on_progress)))
+
+
+@app.cli.command('pack-testcases')
+@click.option('--problem-id', help='Only pack the cases of this problem.')
+def pack_testcases_command(problem_id):
+    """Writes a cases.pack next to the sample and test case files of every problem (or of one)."""
+    packed = {'directories': 0, 'cases': 0}
+    for _, meta in catalog.refresh().problems:
+        match = re.match(r"C(\d+)([A-Z]+)", str(meta.get('id', '')))
+        if not match or (problem_id and meta.get('id') != problem_id):
+            continue
+        problem_dir = os.path.join(DATA_DIR, 'contests', f"C{match.group(1)}", 'problems', match.group(2))
+        for dir_type in ('samples', 'testcases'):
+            directory = os.path.join(problem_dir, dir_type)
+            cases = _load_loose_cases(directory, dir_type)
+            if cases:
+                write_pack(directory, cases)
+                packed['directories'] += 1
+                packed['cases'] += len(cases)
+    print(json.dumps(packed))
+
+
+def warm_up():
+    """Loads the catalog and every problem page into the caches so the first requests are already fast.
+
+    Called by wsgi.py before a production server starts accepting connections.
+    """
+    start = time.perf_counter()
+    problems = catalog.refresh().problems
+    for contest_id, meta in problems:
+        match = re.match(r"C(\d+)([A-Z]+)", str(meta.get('id', '')))
+        if not match:
+            continue
+        problem_dir = os.path.join(DATA_DIR, 'contests', f"C{match.group(1)}", 'problems', match.group(2))
+        if os.path.isdir(problem_dir):
+            _problem_detail(problem_dir)
+    log_event(logger, 'warm_up', problems=len(problems), duration_ms=round((time.perf_counter() - start) * 1000, 2))
+
+
+if __name__ == '__main__':
+    # With the reloader on, only the serving child process should pick up queued work.
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        catalog.refresh()
+        submission_queue.resume_pending()
+    app.run(debug=True, port=5001)
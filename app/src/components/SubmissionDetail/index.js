@@ -26,6 +26,33 @@ const SubmissionDetail = ({ theme }) => {
         document.title = `Submission: ${submissionId}`;
     }, [submissionId]);
 
+    const isJudging = submission && (submission.status === 'queued' || submission.status === 'running');
+
+    useEffect(() => {
+        if (!isJudging) {
+            return undefined;
+        }
+
+        // Show every case verdict as soon as the server has judged it.
+        const events = new EventSource(`http://localhost:5001/submissions/${submissionId}/events`);
+        events.addEventListener('case', (e) => {
+            const { index, ...result } = JSON.parse(e.data);
+            setSubmission((current) => {
+                const results = [...(current.results || [])];
+                results[index] = result;
+                return { ...current, status: 'running', results };
+            });
+        });
+        events.addEventListener('done', (e) => {
+            const { status } = JSON.parse(e.data);
+            setSubmission((current) => ({ ...current, status }));
+            events.close();
+        });
+        events.onerror = () => events.close();
+
+        return () => events.close();
+    }, [submissionId, isJudging]);
+
     if (error) {
         return <div className={`submission-detail-container ${theme}`}><p style={{ color: 'red' }}>{error}</p></div>;
     }
@@ -41,6 +68,7 @@ const SubmissionDetail = ({ theme }) => {
             <p><strong>Problem ID:</strong> <Link to={`/problems/${submission.problem_id}`}>{submission.problem_id}</Link></p>
             <p><strong>Language:</strong> {submission.language}</p>
             <p><strong>Timestamp:</strong> {new Date(submission.timestamp).toLocaleString()}</p>
+            {submission.status && <p><strong>Status:</strong> {submission.status}</p>}
             
             <h2>Code</h2>
             <pre>{submission.code}</pre>
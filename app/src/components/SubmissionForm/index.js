@@ -3,8 +3,24 @@ import React, { useState } from 'react';
 const SubmissionForm = ({ problemId, setSubmissionResult }) => {
     const [code, setCode] = useState('');
     const [language, setLanguage] = useState('python');
+    const [stopOnFirstFailure, setStopOnFirstFailure] = useState(false);
     const [isSubmitting, setIsSubmitting] = useState(false);
 
+    const pollStatus = async (submissionId) => {
+        while (true) {
+            const response = await fetch(`http://localhost:5001/submissions/${submissionId}/status`);
+            if (!response.ok) {
+                throw new Error('Fetching submission status failed');
+            }
+            const status = await response.json();
+            setSubmissionResult({ ...status, submission_id: submissionId });
+            if (status.status !== 'queued' && status.status !== 'running') {
+                return;
+            }
+            await new Promise((resolve) => setTimeout(resolve, 1000));
+        }
+    };
+
     const handleSubmit = async (e) => {
         e.preventDefault();
         setIsSubmitting(true);
@@ -16,15 +32,22 @@ const SubmissionForm = ({ problemId, setSubmissionResult }) => {
                 headers: {
                     'Content-Type': 'application/json',
                 },
-                body: JSON.stringify({ code, language }),
+                body: JSON.stringify({ code, language, stop_on_first_failure: stopOnFirstFailure || undefined }),
             });
 
             if (!response.ok) {
                 throw new Error('Submission failed');
             }
 
-            const result = await response.json();
-            setSubmissionResult(result);
+            const { submission_id } = await response.json();
+            await pollStatus(submission_id);
+
+            const detailResponse = await fetch(`http://localhost:5001/submissions/${submission_id}`);
+            if (!detailResponse.ok) {
+                throw new Error('Fetching submission failed');
+            }
+            const result = await detailResponse.json();
+            setSubmissionResult({ ...result, submission_id });
         } catch (error) {
             console.error('Submission error:', error);
             setSubmissionResult({ error: 'An error occurred during submission.' });
@@ -44,6 +67,16 @@ const SubmissionForm = ({ problemId, setSubmissionResult }) => {
                         <option value="c++">C++</option>
                     </select>
                 </div>
+                <div>
+                    <label>
+                        <input
+                            type="checkbox"
+                            checked={stopOnFirstFailure}
+                            onChange={(e) => setStopOnFirstFailure(e.target.checked)}
+                        />
+                        Stop on first failure
+                    </label>
+                </div>
                 <div>
                     <label>Code:</label>
                     <textarea
@@ -55,7 +88,7 @@ const SubmissionForm = ({ problemId, setSubmissionResult }) => {
                     />
                 </div>
                 <button type="submit" disabled={isSubmitting}>
-                    {isSubmitting ? 'Submitting...' : 'Submit'}
+                    {isSubmitting ? 'Judging...' : 'Submit'}
                 </button>
             </form>
         </div>
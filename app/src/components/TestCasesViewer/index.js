@@ -4,12 +4,15 @@ import Loading from '../Loading';
 import CopyButton from '../CopyButton';
 import './index.css';
 
+const PREVIEW_BYTES = 64 * 1024;
+
 function TestCasesViewer({ theme }) {
   const { problemId } = useParams();
   const [testCases, setTestCases] = useState({ sample_cases: [], normal_cases: [] });
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [collapsedCases, setCollapsedCases] = useState({});
+  const [previews, setPreviews] = useState({});
 
   useEffect(() => {
     document.title = `Test Cases for ${problemId}`;
@@ -56,30 +59,69 @@ function TestCasesViewer({ theme }) {
     fetchTestCases();
   }, [problemId]);
 
-  const toggleCollapse = (caseName) => {
+  const caseUrl = (tc, part) => `http://localhost:5001/problems/${problemId}/testcases/${tc.name}/${part}`;
+
+  const fetchPreview = async (tc) => {
+    try {
+      const [input, output] = await Promise.all(['input', 'output'].map(async part => {
+        const response = await fetch(`${caseUrl(tc, part)}?preview=${PREVIEW_BYTES}`);
+        if (!response.ok) {
+          throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        return response.json();
+      }));
+      setPreviews(prev => ({ ...prev, [tc.name]: { input, output } }));
+    } catch (e) {
+      setPreviews(prev => ({ ...prev, [tc.name]: { error: `Failed to fetch test case: ${e.message}` } }));
+    }
+  };
+
+  const toggleCollapse = (tc) => {
+    if (collapsedCases[tc.name] && !previews[tc.name]) {
+      fetchPreview(tc);
+    }
     setCollapsedCases(prev => ({
       ...prev,
-      [caseName]: !prev[caseName]
+      [tc.name]: !prev[tc.name]
     }));
   };
 
+  const renderPart = (tc, part, fileName) => {
+    const preview = previews[tc.name][part];
+    return (
+      <>
+        <h5>
+          {part === 'input' ? 'Input' : 'Output'} ({fileName}, {preview.size} bytes) <CopyButton textToCopy={preview.content} theme={theme} />
+        </h5>
+        <pre>{preview.content}</pre>
+        {preview.truncated && (
+          <p style={{ fontSize: '0.8em', color: '#888' }}>
+            Showing the first {PREVIEW_BYTES} bytes. <a href={caseUrl(tc, part)} target="_blank" rel="noopener noreferrer">Open the full file</a>
+          </p>
+        )}
+      </>
+    );
+  };
+
   const renderTestCase = (tc, index) => {
     const isCollapsed = collapsedCases[tc.name];
     return (
       <div key={index} className="testcases-viewer-case-container">
-        <h4 onClick={() => toggleCollapse(tc.name)} style={{ cursor: 'pointer' }}>
+        <h4 onClick={() => toggleCollapse(tc)} style={{ cursor: 'pointer' }}>
           <span className={`testcases-viewer-collapse-icon ${isCollapsed ? 'collapsed' : ''}`}>
             {isCollapsed ? '▶' : '▼'}
           </span>
           Test Case #{index + 1}: {tc.name}
         </h4>
         <h6 style={{ fontSize: '0.8em', color: '#888', marginTop: '-10px' }}>{tc.absolute_path}</h6>
-        {!isCollapsed && (
+        {!isCollapsed && !previews[tc.name] && <p>Loading...</p>}
+        {!isCollapsed && previews[tc.name] && previews[tc.name].error && (
+          <p style={{ color: 'red' }}>{previews[tc.name].error}</p>
+        )}
+        {!isCollapsed && previews[tc.name] && !previews[tc.name].error && (
           <>
-            <h5>Input ({tc.input_file}) <CopyButton textToCopy={tc.input} theme={theme} /></h5>
-            <pre>{tc.input}</pre>
-            <h5>Output ({tc.output_file}) <CopyButton textToCopy={tc.output} theme={theme} /></h5>
-            <pre>{tc.output}</pre>
+            {renderPart(tc, 'input', tc.input_file)}
+            {renderPart(tc, 'output', tc.output_file)}
           </>
         )}
       </div>
@@ -0,0 +1,60 @@
+"""Compares round trips and compilations per submission for the judge's execution protocols.
+
+Each protocol is selected the way the server selects it in production: by what the
+stub judge advertises on /api/capabilities.
+
+    python -m benchmarks.bench_batch_execute --cases 60 --latency 0.005
+"""
+import argparse
+import json
+import tempfile
+import time
+
+from benchmarks.stub_judge import StubJudge
+from judge_client import JudgeClient
+from judging import judge_cases
+
+PROTOCOLS = {
+    'per_case': {},
+    'batch': {'batch': True},
+    'compile_then_run': {'compile': True},
+}
+
+
+def _measure(cases, problem_dir, latency, **features):
+    with StubJudge(latency=latency, **features) as judge:
+        client = JudgeClient(base_url=judge.url)
+        client.capabilities()
+        judge.reset_stats()
+
+        start = time.perf_counter()
+        # Every protocol judges the same cases; the verdict cache would answer all but the first.
+        results = judge_cases(cases, '', 'c++', problem_dir, client=client, use_cache=False)
+        elapsed = time.perf_counter() - start
+        client.close()
+
+        stats = dict(judge.stats)
+    return {
+        'accepted': sum(1 for result in results if result['status'] == 'Accepted'),
+        'round_trips': sum(count for key, count in stats.items() if key.startswith('/api/')),
+        'compilations': stats.get('compilations', 0),
+        'seconds': elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cases', type=int, default=60)
+    parser.add_argument('--latency', type=float, default=0.005)
+    args = parser.parse_args()
+
+    cases = [{'name': f"testcases/{i}", 'input': f"{i}\n", 'output': f"{i}\n"} for i in range(args.cases)]
+    with tempfile.TemporaryDirectory() as problem_dir:
+        report = {'cases': args.cases, 'latency': args.latency}
+        for name, features in PROTOCOLS.items():
+            report[name] = _measure(cases, problem_dir, args.latency, **features)
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == '__main__':
+    main()
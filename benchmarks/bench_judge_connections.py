@@ -0,0 +1,60 @@
+"""Compares judge connections per submission with bare requests.post versus JudgeClient.
+
+    python -m benchmarks.bench_judge_connections --cases 60 --submissions 5
+"""
+import argparse
+import json
+import time
+
+import requests
+
+from benchmarks.stub_judge import StubJudge
+from judge_client import JudgeClient
+
+
+def _submit_bare(url, cases):
+    # The way submit_solution talked to the judge before JudgeClient existed.
+    for stdin in cases:
+        requests.post(f"{url}/api/execute", json={'code': '', 'language': 'python', 'stdin': stdin}).json()
+
+
+def _submit_pooled(client, cases):
+    for stdin in cases:
+        client.execute('', 'python', stdin)
+
+
+def _measure(judge, submissions, run):
+    judge.reset_stats()
+    start = time.perf_counter()
+    for _ in range(submissions):
+        run()
+    elapsed = time.perf_counter() - start
+    return {
+        'connections_per_submission': judge.stats.get('connections', 0) / submissions,
+        'requests_per_submission': judge.stats.get('/api/execute', 0) / submissions,
+        'seconds_per_submission': elapsed / submissions,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cases', type=int, default=60)
+    parser.add_argument('--submissions', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=0.0)
+    args = parser.parse_args()
+
+    cases = [f"{i}\n" for i in range(args.cases)]
+    with StubJudge(latency=args.latency) as judge:
+        client = JudgeClient(base_url=judge.url)
+        report = {
+            'cases': args.cases,
+            'submissions': args.submissions,
+            'before': _measure(judge, args.submissions, lambda: _submit_bare(judge.url, cases)),
+            'after': _measure(judge, args.submissions, lambda: _submit_pooled(client, cases)),
+        }
+        client.close()
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == '__main__':
+    main()
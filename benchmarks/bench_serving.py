@@ -0,0 +1,48 @@
+"""Measures request throughput of the dev server and the gunicorn production setup at several concurrency levels.
+
+    python -m benchmarks.bench_serving --servers werkzeug,gunicorn --concurrency 1,8,32
+
+Both servers are started against a synthetic DATA tree and hit with a mix of
+listing, problem detail and test case manifest requests.
+"""
+import argparse
+import json
+import os
+import tempfile
+
+from benchmarks.harness import running_server, run_load
+from benchmarks.synthetic_data import generate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--servers', default='werkzeug,gunicorn')
+    parser.add_argument('--concurrency', default='1,8,32')
+    parser.add_argument('--duration', type=float, default=5)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--port', type=int, default=5011)
+    parser.add_argument('--contests', type=int, default=25)
+    args = parser.parse_args()
+
+    report = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = os.path.join(tmp, 'data')
+        problem_ids = generate(data_dir, contests=args.contests, problems=4, testcases=20, input_bytes=4096)
+        paths = ['/problems', '/contests', '/solutions']
+        for problem_id in problem_ids[:20]:
+            paths += [f"/problems/{problem_id}", f"/problems/{problem_id}/testcases"]
+
+        def fetch(base_url):
+            return lambda session, index: session.get(base_url + paths[index % len(paths)], timeout=30).ok
+
+        env = {'DATA_DIR': data_dir, 'SUBMISSION_DB_PATH': os.path.join(tmp, 'submissions.db')}
+        for server in args.servers.split(','):
+            with running_server(server, args.port, env, args.workers, args.threads) as base_url:
+                report[server] = {concurrency: run_load(fetch(base_url), concurrency, args.duration)
+                                  for concurrency in (int(c) for c in args.concurrency.split(','))}
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Compares /submissions list latency for the JSON-file and SQLite submission stores.
+
+    python -m benchmarks.bench_submission_list --sizes 1000,10000,100000
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+
+from submission_store import JsonFileSubmissionStore, SqliteSubmissionStore
+
+LANGUAGES = ('python', 'c++')
+CODE = 'n = int(input())\nprint(sum(range(n)))\n' * 20
+
+
+def _make_submission(index):
+    timestamp = datetime.datetime(2025, 1, 1) + datetime.timedelta(seconds=index)
+    return {
+        'id': str(uuid.uuid4()),
+        'problem_id': f"C{index % 20}{'ABCD'[index % 4]}",
+        'language': LANGUAGES[index % len(LANGUAGES)],
+        'code': CODE,
+        'results': [{'case': f"testcases/{i}", 'status': 'Accepted', 'stdout': '42\n' * 10, 'stderr': ''}
+                    for i in range(10)],
+        'timestamp': timestamp.isoformat(),
+        'status': 'finished',
+    }
+
+
+def _timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return {'median_ms': statistics.median(samples) * 1000, 'max_ms': max(samples) * 1000}
+
+
+def _bench_size(size, repeat):
+    with tempfile.TemporaryDirectory() as tmp:
+        json_store = JsonFileSubmissionStore(os.path.join(tmp, 'json'))
+        sqlite_store = SqliteSubmissionStore(os.path.join(tmp, 'submissions.db'))
+        submissions = [_make_submission(i) for i in range(size)]
+        random.shuffle(submissions)
+        os.makedirs(json_store.directory)
+        for submission in submissions:
+            with open(os.path.join(json_store.directory, f"{submission['id']}.json"), 'w') as f:
+                json.dump(submission, f, indent=4)
+        sqlite_store.save_many(submissions)
+
+        return {
+            'json_full_list': _timed(lambda: json_store.list_summaries(), repeat),
+            'sqlite_full_list': _timed(lambda: sqlite_store.list_summaries(), repeat),
+            'sqlite_first_page': _timed(lambda: sqlite_store.list_summaries(limit=50), repeat),
+            'sqlite_problem_page': _timed(lambda: sqlite_store.list_summaries(problem_id='C1B', limit=50), repeat),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='1000,10000,100000')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    report = {}
+    for size in (int(s) for s in args.sizes.split(',')):
+        report[size] = _bench_size(size, args.repeat)
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""Compares two load_test reports and lists the scenarios that got slower.
+
+    python -m benchmarks.compare baseline.json report.json --threshold 0.10
+
+Exits with status 1 when any p95 latency grew, or any throughput dropped, by more
+than the threshold, so it can gate a CI job.
+"""
+import argparse
+import json
+import sys
+
+
+def compare(baseline, current, threshold):
+    """Returns one entry per scenario and concurrency level present in both reports."""
+    rows = []
+    for scenario, levels in current['scenarios'].items():
+        for concurrency, stats in levels.items():
+            base = baseline.get('scenarios', {}).get(scenario, {}).get(concurrency)
+            if not base or not base.get('requests') or not stats.get('requests'):
+                continue
+            p95_change = stats['p95_ms'] / base['p95_ms'] - 1 if base['p95_ms'] else 0.0
+            throughput_change = stats['throughput_rps'] / base['throughput_rps'] - 1
+            rows.append({
+                'scenario': scenario,
+                'concurrency': concurrency,
+                'p95_change': round(p95_change, 4),
+                'throughput_change': round(throughput_change, 4),
+                'regression': p95_change > threshold or throughput_change < -threshold,
+            })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--threshold', type=float, default=0.10)
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    rows = compare(baseline, current, args.threshold)
+    print(json.dumps(rows, indent=4))
+    sys.exit(1 if any(row['regression'] for row in rows) else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""Shared helpers for the benchmarks that drive a real server process over HTTP."""
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def server_command(server, port, workers=4, threads=8):
+    if server == 'gunicorn':
+        return [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', f"127.0.0.1:{port}",
+                '--workers', str(workers), '--threads', str(threads), 'wsgi:app']
+    # The dev server as `python app.py` runs it, minus the reloader.
+    return [sys.executable, '-c', f"from app import app; app.run(debug=True, use_reloader=False, port={port})"]
+
+
+def wait_until_up(base_url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{base_url}/problems?per_page=1", timeout=1).ok:
+                return
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not start")
+
+
+@contextmanager
+def running_server(server, port, env, workers=4, threads=8):
+    """Starts the server in a subprocess with the given extra environment and yields its base URL."""
+    base_url = f"http://127.0.0.1:{port}"
+    process = subprocess.Popen(server_command(server, port, workers, threads), cwd=ROOT,
+                               env=dict(os.environ, LOG_FILE='', LOG_LEVEL='WARNING', **env),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_up(base_url)
+        yield base_url
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def summarize(latencies, elapsed, errors=0):
+    """Turns a list of latencies in seconds into the numbers every benchmark reports."""
+    if not latencies:
+        return {'requests': 0, 'errors': errors, 'throughput_rps': 0.0}
+    ordered = sorted(latencies)
+    return {
+        'requests': len(ordered),
+        'errors': errors,
+        'throughput_rps': len(ordered) / elapsed,
+        'p50_ms': statistics.median(ordered) * 1000,
+        'p95_ms': _percentile(ordered, 0.95) * 1000,
+        'p99_ms': _percentile(ordered, 0.99) * 1000,
+        'max_ms': ordered[-1] * 1000,
+    }
+
+
+def run_load(operation, concurrency, duration):
+    """Calls operation(session, index) from `concurrency` threads for `duration` seconds.
+
+    operation returns True on success; index counts the calls across all threads.
+    Returns the summary of the latencies and errors.
+    """
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def worker(offset):
+        session = requests.Session()
+        samples = []
+        failed = 0
+        index = offset
+        while time.monotonic() < stop_at:
+            start = time.perf_counter()
+            try:
+                ok = operation(session, index)
+            except requests.exceptions.RequestException:
+                ok = False
+            samples.append(time.perf_counter() - start)
+            if not ok:
+                failed += 1
+            index += concurrency
+        with lock:
+            latencies.extend(samples)
+            errors[0] += failed
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return summarize(latencies, time.perf_counter() - start, errors[0])
@@ -0,0 +1,138 @@
+"""Runs the scripted load-test scenarios against a server backed by a synthetic DATA tree and the stub judge.
+
+    python -m benchmarks.load_test --scenarios listings,problem_detail,testcases,submissions --output report.json
+
+Every scenario is run at each concurrency level and reported with p50/p95/p99
+latency and throughput as JSON, so runs can be diffed to catch regressions:
+
+    listings        GET /problems, /contests and /solutions, whole and paginated
+    problem_detail  GET /problems/<id>
+    testcases       the test case manifest, a preview and a ranged read of one case
+    submissions     POST a submission and poll its status until it is judged; the
+                    latency is the end-to-end judging time
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import tempfile
+import time
+
+from benchmarks.harness import running_server, run_load
+from benchmarks.stub_judge import StubJudge
+from benchmarks.synthetic_data import generate
+
+
+def _get_ok(session, url, **kwargs):
+    response = session.get(url, timeout=30, **kwargs)
+    return response.ok
+
+
+def listings(base_url, problem_ids, testcases_per_problem):
+    paths = ['/problems', '/contests', '/solutions', '/problems?page=2&per_page=20', '/problems?tag=math']
+
+    def operation(session, index):
+        return _get_ok(session, base_url + paths[index % len(paths)])
+    return operation
+
+
+def problem_detail(base_url, problem_ids, testcases_per_problem):
+    def operation(session, index):
+        return _get_ok(session, f"{base_url}/problems/{problem_ids[index % len(problem_ids)]}")
+    return operation
+
+
+def testcases(base_url, problem_ids, testcases_per_problem):
+    def operation(session, index):
+        problem_id = problem_ids[index % len(problem_ids)]
+        case_url = f"{base_url}/problems/{problem_id}/testcases/testcases/{index % testcases_per_problem + 1}/input"
+        return (_get_ok(session, f"{base_url}/problems/{problem_id}/testcases")
+                and _get_ok(session, f"{case_url}?preview=1024")
+                and _get_ok(session, case_url, headers={'Range': 'bytes=0-4095'}))
+    return operation
+
+
+def submissions(base_url, problem_ids, testcases_per_problem, poll_interval=0.02, timeout=120):
+    def operation(session, index):
+        problem_id = problem_ids[index % len(problem_ids)]
+        # A distinct program every time, so the verdict cache does not answer for the judge.
+        code = f"print(sum(map(int, open(0).read().split())))  # {index} {time.time()}"
+        response = session.post(f"{base_url}/problems/{problem_id}/submit",
+                                json={'code': code, 'language': 'python'}, timeout=30)
+        if response.status_code != 202:
+            return False
+        submission_id = response.json()['submission_id']
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            status = session.get(f"{base_url}/submissions/{submission_id}/status", timeout=30).json()
+            if status.get('status') not in ('queued', 'running'):
+                return status.get('status') == 'finished'
+            time.sleep(poll_interval)
+        return False
+    return operation
+
+
+SCENARIOS = {
+    'listings': listings,
+    'problem_detail': problem_detail,
+    'testcases': testcases,
+    'submissions': submissions,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--concurrency', default='1,8,32')
+    parser.add_argument('--duration', type=float, default=5, help='seconds per scenario and concurrency level')
+    parser.add_argument('--server', default='werkzeug', choices=('werkzeug', 'gunicorn'))
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--port', type=int, default=5012)
+    parser.add_argument('--contests', type=int, default=10)
+    parser.add_argument('--problems', type=int, default=4)
+    parser.add_argument('--testcases', type=int, default=10)
+    parser.add_argument('--input-bytes', type=int, default=1024)
+    parser.add_argument('--judge-latency', type=float, default=0.01, help='seconds the stub judge takes per request')
+    parser.add_argument('--batch-mode', default='auto', help='JUDGE_BATCH_MODE for the server')
+    parser.add_argument('--output', help='also write the JSON report to this file')
+    args = parser.parse_args()
+    unknown = set(args.scenarios.split(',')) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    concurrency_levels = [int(c) for c in args.concurrency.split(',')]
+    report = {
+        'started_at': datetime.datetime.utcnow().isoformat(),
+        'machine': {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count()},
+        'config': {key: value for key, value in vars(args).items() if key != 'output'},
+        'scenarios': {},
+    }
+    with tempfile.TemporaryDirectory() as tmp, StubJudge(latency=args.judge_latency) as judge:
+        data_dir = os.path.join(tmp, 'data')
+        problem_ids = generate(data_dir, args.contests, args.problems, testcases=args.testcases,
+                               input_bytes=args.input_bytes)
+        env = {
+            'DATA_DIR': data_dir,
+            'SUBMISSION_DB_PATH': os.path.join(tmp, 'submissions.db'),
+            'JUDGE_SERVICE_URL': judge.url,
+            'JUDGE_BATCH_MODE': args.batch_mode,
+        }
+        with running_server(args.server, args.port, env, args.workers, args.threads) as base_url:
+            for name in args.scenarios.split(','):
+                operation = SCENARIOS[name](base_url, problem_ids, args.testcases)
+                report['scenarios'][name] = {
+                    concurrency: run_load(operation, concurrency, args.duration) for concurrency in concurrency_levels
+                }
+        report['judge_requests'] = {key: count for key, count in judge.stats.items() if key.startswith('/api/')}
+
+    output = json.dumps(report, indent=4)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+"""A tiny stand-in for the judge service used by the benchmarks.
+
+The stub "executes" every submission as `cat`: the stdout it returns is the stdin it
+was given. Validation always succeeds with `Accepted`. It counts the TCP connections,
+requests and compilations it serves so benchmarks can compare how the server talks
+to the judge.
+
+Besides the per-case execute API it can advertise (through /api/capabilities) and
+serve the batch protocol (/api/execute_batch) and the compile-then-run protocol
+(/api/compile followed by /api/run).
+
+Run it standalone with:
+
+    python -m benchmarks.stub_judge --port 5002 --latency 0.01 --batch --compile
+"""
+import argparse
+import json
+import threading
+import time
+import uuid
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.judge.count('connections')
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        judge = self.server.judge
+        if self.path != '/api/capabilities':
+            self._send_json(404, {'error': f'unknown endpoint {self.path}'})
+            return
+        judge.count(self.path)
+        self._send_json(200, judge.capabilities())
+
+    def do_POST(self):
+        judge = self.server.judge
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        route = judge.routes.get(self.path) if judge.path_enabled(self.path) else None
+        if route is None:
+            self._send_json(404, {'error': f'unknown endpoint {self.path}'})
+            return
+        judge.count(self.path)
+        if judge.latency:
+            time.sleep(judge.latency)
+        self._send_json(200, route(payload))
+
+
+class StubJudge:
+    """Threaded HTTP server imitating the judge's execute and validate endpoints."""
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, batch=False, compile=False):
+        self.latency = latency
+        self.batch = batch
+        self.compile = compile
+        self.routes = {
+            '/api/execute': self.execute,
+            '/api/validate': self.validate,
+            '/api/execute_batch': self.execute_batch,
+            '/api/compile': self.compile_code,
+            '/api/run': self.run,
+        }
+        self.programs = {}
+        self.stats = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.judge = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] = self.stats.get(key, 0) + amount
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = {}
+
+    def path_enabled(self, path):
+        if path == '/api/execute_batch':
+            return self.batch
+        if path in ('/api/compile', '/api/run'):
+            return self.compile
+        return True
+
+    def capabilities(self):
+        return {'batch': self.batch, 'compile': self.compile}
+
+    def execute(self, payload):
+        self.count('compilations')
+        return {'stdout': payload.get('stdin') or '', 'stderr': ''}
+
+    def execute_batch(self, payload):
+        self.count('compilations')
+        return {'results': [{'stdout': stdin or '', 'stderr': ''} for stdin in payload.get('stdins', [])]}
+
+    def compile_code(self, payload):
+        self.count('compilations')
+        handle = str(uuid.uuid4())
+        with self._lock:
+            self.programs[handle] = payload.get('code')
+        return {'handle': handle}
+
+    def run(self, payload):
+        if payload.get('handle') not in self.programs:
+            return {'error': 'unknown handle'}
+        return {'stdout': payload.get('stdin') or '', 'stderr': ''}
+
+    def validate(self, payload):
+        return {'success': True, 'stdout': 'Accepted', 'stderr': ''}
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5002)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds to sleep per request')
+    parser.add_argument('--batch', action='store_true', help='advertise and serve /api/execute_batch')
+    parser.add_argument('--compile', action='store_true', help='advertise and serve /api/compile and /api/run')
+    args = parser.parse_args()
+
+    judge = StubJudge(args.host, args.port, args.latency, batch=args.batch, compile=args.compile)
+    print(f"Stub judge listening on {judge.url}")
+    try:
+        judge._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Generates a synthetic DATA tree (contests, problems, samples and test cases) for benchmarks.
+
+    python -m benchmarks.synthetic_data /tmp/bench-data --contests 20 --problems 4 --testcases 20
+
+Every test case asks for the sum of the numbers in its input, so the output of a
+program that echoes nothing is Wrong Answer and a correct sum is Accepted.
+"""
+import argparse
+import json
+import os
+import random
+
+LETTERS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+TAGS = ('math', 'dp', 'greedy', 'graphs', 'strings', 'implementation')
+
+
+def _write(path, content):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+def _numbers(rng, input_bytes):
+    count = max(1, input_bytes // 7)
+    return [rng.randint(1, 999999) for _ in range(count)]
+
+
+def write_problem(problem_dir, problem_id, rng, samples=2, testcases=10, input_bytes=64):
+    os.makedirs(os.path.join(problem_dir, 'testcases'), exist_ok=True)
+    meta = {
+        'id': problem_id,
+        'title': f"Sum {problem_id}",
+        'tags': rng.sample(TAGS, 2),
+        'difficulty': rng.choice(('easy', 'medium', 'hard')),
+    }
+    _write(os.path.join(problem_dir, 'meta.json'), json.dumps(meta, indent=4))
+    _write(os.path.join(problem_dir, 'problem.md'),
+           "## Description\nPrint the sum of the numbers.\n" + "Some statement text. " * 50 +
+           "\n## Input\nWhitespace separated integers.\n## Output\nTheir sum.\n"
+           "## Constraints\n1 <= a_i <= 10^6\n## Notes\nNone.\n")
+
+    for index in range(1, samples + 1):
+        sample_dir = os.path.join(problem_dir, 'samples', f"sample{index}")
+        os.makedirs(sample_dir, exist_ok=True)
+        numbers = _numbers(rng, 32)
+        _write(os.path.join(sample_dir, 'input.md'), "```\n" + ' '.join(map(str, numbers)) + "\n```")
+        _write(os.path.join(sample_dir, 'output.md'), f"```\n{sum(numbers)}\n```")
+        _write(os.path.join(sample_dir, 'description.md'), "Add them up.")
+
+    for index in range(1, testcases + 1):
+        numbers = _numbers(rng, input_bytes)
+        _write(os.path.join(problem_dir, 'testcases', f"{index}.in"), ' '.join(map(str, numbers)) + "\n")
+        _write(os.path.join(problem_dir, 'testcases', f"{index}.out"), f"{sum(numbers)}\n")
+
+
+def generate(root, contests=10, problems=4, samples=2, testcases=10, input_bytes=64, seed=0):
+    """Writes the tree under root and returns the list of generated problem ids."""
+    rng = random.Random(seed)
+    problem_ids = []
+    for contest in range(1, contests + 1):
+        contest_id = f"C{contest}"
+        contest_dir = os.path.join(root, 'contests', contest_id)
+        os.makedirs(contest_dir, exist_ok=True)
+        _write(os.path.join(contest_dir, 'meta.json'), json.dumps({'id': contest_id, 'name': f"Contest {contest}"}))
+        _write(os.path.join(contest_dir, 'contest.md'), f"# Contest {contest}\n")
+        for letter in LETTERS[:problems]:
+            problem_id = f"{contest_id}{letter}"
+            write_problem(os.path.join(contest_dir, 'problems', letter), problem_id, rng, samples, testcases,
+                          input_bytes)
+            solution_dir = os.path.join(root, 'solutions', problem_id)
+            os.makedirs(solution_dir, exist_ok=True)
+            _write(os.path.join(solution_dir, 'solution.md'), "Sum the numbers.\n")
+            problem_ids.append(problem_id)
+    return problem_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('root')
+    parser.add_argument('--contests', type=int, default=10)
+    parser.add_argument('--problems', type=int, default=4)
+    parser.add_argument('--samples', type=int, default=2)
+    parser.add_argument('--testcases', type=int, default=10)
+    parser.add_argument('--input-bytes', type=int, default=64)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    problem_ids = generate(args.root, args.contests, args.problems, args.samples, args.testcases, args.input_bytes,
+                           args.seed)
+    print(json.dumps({'root': args.root, 'problems': len(problem_ids)}))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""Packed test data: all the cases of one samples/ or testcases/ directory in a single indexed file.
+
+    flask --app app pack-testcases [--problem-id C1A]
+
+writes a cases.pack next to the loose case files. The layout is
+
+    b'CPK1' | uint32 index length | JSON index | case data
+
+where the index lists every case with the [offset, length] of its cleaned input
+and expected output in the data section (null for a missing file) and the sha256
+of the input, the expected output and the expected output with surrounding
+whitespace stripped. The last one lets the exact checker accept an output by its
+hash. The file is read through mmap: loading the cases of a directory is a single
+open instead of two reads and a markdown cleanup per case.
+"""
+import os
+import json
+import mmap
+import struct
+import hashlib
+
+PACK_FILE_NAME = 'cases.pack'
+PACK_VERSION = 1
+
+_MAGIC = b'CPK1'
+_HEADER = struct.Struct('<4sI')
+
+
+def _sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def case_digests(input_content, output_content):
+    """The hashes every loaded case carries: of its input, its expected output and the stripped expected output."""
+    output_content = output_content or ''
+    return {
+        'input_sha256': _sha256((input_content or '').encode('utf-8')),
+        'output_sha256': _sha256(output_content.encode('utf-8')),
+        'normalized_output_sha256': _sha256(output_content.strip().encode('utf-8')),
+    }
+
+
+def pack_path(directory):
+    """Returns the pack of a case directory, or None if there is none or it is older than the loose files.
+
+    Adding, removing or editing a case changes the modification time of the case file
+    or of its directory, so a pack is only used while it is newer than all of them.
+    """
+    path = os.path.join(directory, PACK_FILE_NAME)
+    try:
+        packed_at = os.stat(path).st_mtime_ns
+        if os.stat(directory).st_mtime_ns > packed_at:
+            return None
+        for entry in os.scandir(directory):
+            if entry.name == PACK_FILE_NAME:
+                continue
+            if entry.stat().st_mtime_ns > packed_at:
+                return None
+            if entry.is_dir() and any(sub.stat().st_mtime_ns > packed_at for sub in os.scandir(entry.path)):
+                return None
+    except OSError:
+        return None
+    return path
+
+
+def write_pack(directory, cases):
+    """Writes the cases loaded from the loose files of a directory to its cases.pack and returns the path."""
+    index = []
+    chunks = []
+    offset = 0
+    for case in cases:
+        entry = {
+            'name': case['name'],
+            'input_file': case['input_file'],
+            'output_file': case['output_file'],
+            'path': os.path.relpath(case['absolute_path'], directory),
+        }
+        for part in ('input', 'output'):
+            # A missing file loads as None from the loose files and has to load the same from the pack.
+            if case[part] is None:
+                entry[part] = None
+                continue
+            data = case[part].encode('utf-8')
+            entry[part] = [offset, len(data)]
+            chunks.append(data)
+            offset += len(data)
+        entry.update(case_digests(case['input'], case['output']))
+        index.append(entry)
+
+    index_bytes = json.dumps({'version': PACK_VERSION, 'cases': index}).encode('utf-8')
+    path = os.path.join(directory, PACK_FILE_NAME)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, len(index_bytes)))
+        f.write(index_bytes)
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(temp_path, path)
+    # Renaming the file into place touched the directory; the pack has to be the newer of the two.
+    os.utime(path)
+    return path
+
+
+def read_pack(path, directory):
+    """Loads the cases of a pack in the same form as the loose-file loader. Raises ValueError for a bad pack."""
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        if len(data) < _HEADER.size:
+            raise ValueError(f"{path} is not a case pack")
+        magic, index_length = _HEADER.unpack_from(data, 0)
+        if magic != _MAGIC:
+            raise ValueError(f"{path} is not a case pack")
+        index = json.loads(data[_HEADER.size:_HEADER.size + index_length])
+        if index.get('version') != PACK_VERSION:
+            raise ValueError(f"{path} has unsupported version {index.get('version')}")
+
+        base = _HEADER.size + index_length
+
+        def text(span):
+            if span is None:
+                return None
+            start, length = span
+            return data[base + start:base + start + length].decode('utf-8')
+
+        cases = []
+        for entry in index['cases']:
+            cases.append({
+                'name': entry['name'],
+                'input_file': entry['input_file'],
+                'output_file': entry['output_file'],
+                'absolute_path': directory if entry['path'] == '.' else os.path.join(directory, entry['path']),
+                'input': text(entry['input']),
+                'output': text(entry['output']),
+                'input_sha256': entry['input_sha256'],
+                'output_sha256': entry['output_sha256'],
+                'normalized_output_sha256': entry['normalized_output_sha256'],
+            })
+        return cases
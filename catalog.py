@@ -0,0 +1,154 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+import time
+
+from problem_cache import file_fingerprint
+
+logger = logging.getLogger(__name__)
+
+# Minimum number of seconds between two scans of the DATA tree for changes.
+CATALOG_REFRESH_SECONDS = float(os.getenv('CATALOG_REFRESH_SECONDS', '2'))
+# Optional path of a JSON file the index is persisted to, so restarts only re-stat the tree.
+CATALOG_INDEX_PATH = os.getenv('CATALOG_INDEX_PATH', '')
+
+INDEX_FORMAT_VERSION = 1
+
+
+class CatalogSnapshot:
+    """Immutable view of the catalog. Lists are sorted newest first, like the listing endpoints."""
+
+    def __init__(self, contests_dir_exists, solutions_dir_exists, problems, contests, solutions):
+        self.contests_dir_exists = contests_dir_exists
+        self.solutions_dir_exists = solutions_dir_exists
+        # (contest_id, meta) pairs so problems can be filtered by the folder they live in.
+        self.problems = problems
+        self.contests = contests
+        self.solutions = solutions
+        digest = hashlib.sha1(json.dumps([problems, contests, solutions], sort_keys=True).encode('utf-8'))
+        self.etag = digest.hexdigest()
+
+
+class Catalog:
+    """In-memory index of the problems, contests and solutions under the DATA directory.
+
+    refresh() re-stats the meta.json files and only re-parses the ones whose mtime or
+    size changed, so keeping the index current costs a directory walk without reads.
+    """
+
+    def __init__(self, data_dir, index_path=CATALOG_INDEX_PATH, refresh_seconds=CATALOG_REFRESH_SECONDS):
+        self.data_dir = data_dir
+        self.index_path = index_path
+        self.refresh_seconds = refresh_seconds
+        self._metas = {}
+        self._snapshot = None
+        self._state = None
+        self._refreshed_at = 0.0
+        self._lock = threading.Lock()
+        self._load_index()
+
+    def _load_index(self):
+        if not self.index_path or not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, 'r') as f:
+                index = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            logger.warning(f"Ignoring unreadable catalog index {self.index_path}")
+            return
+        if index.get('version') == INDEX_FORMAT_VERSION and index.get('data_dir') == self.data_dir:
+            self._metas = {path: (tuple(fp), meta) for path, (fp, meta) in index.get('metas', {}).items()}
+
+    def _save_index(self):
+        if not self.index_path:
+            return
+        index = {
+            'version': INDEX_FORMAT_VERSION,
+            'data_dir': self.data_dir,
+            'metas': {path: [list(fp), meta] for path, (fp, meta) in self._metas.items()},
+        }
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self.index_path)
+
+    def _read_meta(self, meta_path, metas):
+        """Returns the parsed meta.json, reusing the previous parse if the file is unchanged."""
+        fingerprint = file_fingerprint(meta_path)
+        if fingerprint is None:
+            return None
+        previous = self._metas.get(meta_path)
+        if previous is not None and previous[0] == fingerprint:
+            meta = previous[1]
+        else:
+            try:
+                with open(meta_path, 'r', encoding='utf-8') as f:
+                    meta = json.loads(f.read() or 'null')
+            except (OSError, json.JSONDecodeError):
+                meta = None
+        metas[meta_path] = (fingerprint, meta)
+        return meta
+
+    def refresh(self, max_age=None):
+        """Rescans the DATA tree and rebuilds the snapshot if anything changed.
+
+        With max_age, the scan is skipped when the last one is more recent than that.
+        """
+        with self._lock:
+            if max_age is not None and self._snapshot is not None and time.monotonic() - self._refreshed_at < max_age:
+                return self._snapshot
+
+            contests_dir = os.path.join(self.data_dir, 'contests')
+            solutions_dir = os.path.join(self.data_dir, 'solutions')
+            metas = {}
+            problems = []
+            contests = []
+
+            if os.path.isdir(contests_dir):
+                for contest_id in os.listdir(contests_dir):
+                    contest_path = os.path.join(contests_dir, contest_id)
+                    if not os.path.isdir(contest_path):
+                        continue
+                    contest_meta = self._read_meta(os.path.join(contest_path, 'meta.json'), metas)
+                    if isinstance(contest_meta, dict):
+                        contests.append(contest_meta)
+                    problems_dir = os.path.join(contest_path, 'problems')
+                    if not os.path.isdir(problems_dir):
+                        continue
+                    for problem_folder in os.listdir(problems_dir):
+                        problem_path = os.path.join(problems_dir, problem_folder)
+                        if os.path.isdir(problem_path):
+                            problem_meta = self._read_meta(os.path.join(problem_path, 'meta.json'), metas)
+                            if isinstance(problem_meta, dict):
+                                problems.append((contest_id, problem_meta))
+
+            solutions = []
+            if os.path.isdir(solutions_dir):
+                solutions = [d for d in os.listdir(solutions_dir) if os.path.isdir(os.path.join(solutions_dir, d))]
+
+            state = (os.path.isdir(contests_dir), os.path.isdir(solutions_dir), sorted(solutions))
+            changed = metas != self._metas
+            if changed or self._snapshot is None or state != self._state:
+                problems.sort(key=lambda x: x[1].get('id', ''), reverse=True)
+                contests.sort(key=lambda x: x.get('id', ''), reverse=True)
+                solutions.sort(reverse=True)
+                self._snapshot = CatalogSnapshot(state[0], state[1], problems, contests, solutions)
+                self._state = state
+            self._metas = metas
+            self._refreshed_at = time.monotonic()
+
+            if changed:
+                try:
+                    self._save_index()
+                except OSError as e:
+                    logger.warning(f"Could not persist catalog index: {e}")
+            return self._snapshot
+
+    def snapshot(self):
+        """Returns the current snapshot, refreshing it first if it is older than refresh_seconds."""
+        snapshot = self._snapshot
+        if snapshot is None or time.monotonic() - self._refreshed_at >= self.refresh_seconds:
+            return self.refresh(max_age=self.refresh_seconds)
+        return snapshot
@@ -0,0 +1,118 @@
+"""Output checkers used to judge a case once the program has produced its output.
+
+A problem picks a built-in checker in its meta.json, either by name:
+
+    "checker": "tokens"
+
+or with options:
+
+    "checker": {"type": "float", "abs_tolerance": 1e-6, "rel_tolerance": 1e-6}
+
+Built-in checkers run in-process, so only problems that ship their own validator
+script (and no "checker" entry) need a round trip to the judge's validate endpoint.
+"""
+import os
+import json
+import math
+import hashlib
+
+from problem_cache import cached_file, parse_json_or_empty
+
+VALIDATOR_SCRIPT_NAME = os.getenv('VALIDATOR_SCRIPT_NAME', 'validator.py')
+
+
+def exact_compare(expected, actual):
+    """The original diff check: equal after stripping surrounding whitespace."""
+    return actual.strip() == expected.strip()
+
+
+def token_compare(expected, actual):
+    """Equal as whitespace-separated token sequences, ignoring spacing and blank lines."""
+    return actual.split() == expected.split()
+
+
+def case_insensitive_compare(expected, actual):
+    return actual.lower().split() == expected.lower().split()
+
+
+def make_float_compare(abs_tolerance=1e-6, rel_tolerance=1e-6):
+    """Token compare where numeric tokens only have to match within the given tolerances."""
+    def float_compare(expected, actual):
+        expected_tokens = expected.split()
+        actual_tokens = actual.split()
+        if len(expected_tokens) != len(actual_tokens):
+            return False
+        for expected_token, actual_token in zip(expected_tokens, actual_tokens):
+            if expected_token == actual_token:
+                continue
+            try:
+                expected_value = float(expected_token)
+                actual_value = float(actual_token)
+            except ValueError:
+                return False
+            if not math.isclose(actual_value, expected_value, rel_tol=rel_tolerance, abs_tol=abs_tolerance):
+                return False
+        return True
+    return float_compare
+
+
+BUILTIN_CHECKERS = {
+    'exact': lambda options: exact_compare,
+    'tokens': lambda options: token_compare,
+    'case_insensitive': lambda options: case_insensitive_compare,
+    'float': lambda options: make_float_compare(
+        float(options.get('abs_tolerance', 1e-6)),
+        float(options.get('rel_tolerance', 1e-6)),
+    ),
+}
+
+
+class Checker:
+    """How the output of every case of a problem is judged.
+
+    Exactly one of compare (a built-in checker) and validator_code (a custom
+    validator run by the judge service) is set.
+    """
+
+    def __init__(self, name, compare=None, validator_code=None, options=None):
+        self.name = name
+        self.compare = compare
+        self.validator_code = validator_code
+        # Identifies the checker's behaviour, so cached verdicts are dropped when it changes.
+        self.fingerprint = hashlib.sha256(
+            json.dumps([name, options, validator_code], sort_keys=True).encode('utf-8')).hexdigest()
+
+    @property
+    def is_local(self):
+        return self.compare is not None
+
+    def check(self, case, actual):
+        """Runs the built-in checker on a case's expected output and the program's output.
+
+        The exact checker compares the stripped output's hash with the case's
+        normalized_output_sha256 instead of stripping and comparing the expected output.
+        """
+        digest = case.get('normalized_output_sha256')
+        if self.compare is exact_compare and digest is not None:
+            return hashlib.sha256(actual.strip().encode('utf-8')).hexdigest() == digest
+        return self.compare(case['output'] or '', actual)
+
+
+def resolve_checker(problem_dir):
+    """Picks the checker for a problem from its meta.json and validator script.
+
+    Raises ValueError for an unknown checker in meta.json.
+    """
+    meta = cached_file(os.path.join(problem_dir, 'meta.json'), parse_json_or_empty)
+    config = meta.get('checker') if isinstance(meta, dict) else None
+    if config:
+        options = config if isinstance(config, dict) else {'type': config}
+        name = options.get('type', 'exact')
+        if name not in BUILTIN_CHECKERS:
+            raise ValueError(f"Unknown checker {name!r} in meta.json")
+        return Checker(name, compare=BUILTIN_CHECKERS[name](options), options=options)
+
+    validator_code = cached_file(os.path.join(problem_dir, VALIDATOR_SCRIPT_NAME))
+    if validator_code is not None:
+        return Checker('validator', validator_code=validator_code)
+    return Checker('exact', compare=exact_compare)
@@ -0,0 +1,78 @@
+"""Response compression for large JSON bodies.
+
+Brotli is used when the client accepts it and the optional `brotli` package is
+installed, gzip otherwise. Streamed responses (server-sent events, files sent
+with send_file) are left alone.
+"""
+import os
+import gzip
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+RESPONSE_COMPRESSION = os.getenv('RESPONSE_COMPRESSION', '1') == '1'
+# Bodies smaller than this are sent as they are; compressing them costs more than it saves.
+RESPONSE_COMPRESSION_MIN_BYTES = int(os.getenv('RESPONSE_COMPRESSION_MIN_BYTES', '1024'))
+GZIP_LEVEL = int(os.getenv('GZIP_LEVEL', '6'))
+BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', '4'))
+
+
+def _choose_encoding(accept_encodings):
+    if brotli is not None and accept_encodings['br']:
+        return 'br'
+    if accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+
+def compress_response(response, request):
+    """Compresses a JSON response in place if the client accepts gzip or brotli and the body is large enough."""
+    if (not RESPONSE_COMPRESSION or response.direct_passthrough or response.status_code != 200
+            or response.mimetype != 'application/json' or 'Content-Encoding' in response.headers):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = _choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    data = response.get_data()
+    if len(data) < RESPONSE_COMPRESSION_MIN_BYTES:
+        return response
+    if encoding == 'br':
+        data = brotli.compress(data, quality=BROTLI_QUALITY)
+    else:
+        data = gzip.compress(data, compresslevel=GZIP_LEVEL)
+
+    response.set_data(data)
+    response.headers['Content-Encoding'] = encoding
+    # The compressed bytes differ from the plain ones, so a strong validator no longer applies.
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def precompress(data):
+    """Compresses a body that is served many times once for every encoding compress_response() could pick."""
+    if not RESPONSE_COMPRESSION or len(data) < RESPONSE_COMPRESSION_MIN_BYTES:
+        return {}
+    variants = {'gzip': gzip.compress(data, compresslevel=GZIP_LEVEL)}
+    if brotli is not None:
+        variants['br'] = brotli.compress(data, quality=BROTLI_QUALITY)
+    return variants
+
+
+def use_precompressed(response, variants, request):
+    """Swaps in the precompress()ed body the client accepts, so compress_response() leaves the response alone."""
+    response.vary.add('Accept-Encoding')
+    encoding = _choose_encoding(request.accept_encodings)
+    if response.status_code != 200 or encoding not in variants:
+        return response
+    response.set_data(variants[encoding])
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
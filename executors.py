@@ -0,0 +1,352 @@
+"""Backends that run submitted code.
+
+judging.py drives an executor through the interface of judge_client.JudgeClient:
+execute(), validate(), capabilities() and, when advertised, execute_batch() or
+compile()/run(). JUDGE_EXECUTOR picks the backend:
+
+    remote    the external judge service (the default)
+    local     LocalExecutor: sandboxed subprocesses on this machine, no judge needed
+    fallback  the judge service, switching to LocalExecutor for any request the
+              judge service cannot answer (unreachable, timing out or overloaded)
+"""
+import os
+import sys
+import shutil
+import hashlib
+import logging
+import stat
+import signal
+import subprocess
+import tempfile
+import threading
+
+import requests
+
+from judge_client import get_client
+from logging_setup import log_event
+
+try:
+    import resource
+except ImportError:  # Windows: no rlimits, only the wall clock timeout applies.
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+JUDGE_EXECUTOR = os.getenv('JUDGE_EXECUTOR', 'remote')
+PYTHON_EXECUTABLE = os.getenv('PYTHON_EXECUTABLE', 'python')
+GPP_EXECUTABLE = os.getenv('GPP_EXECUTABLE', 'g++')
+GPP_FLAGS = os.getenv('GPP_FLAGS', '-O2 -std=c++17')
+GCC_EXECUTABLE = os.getenv('GCC_EXECUTABLE', 'gcc')
+GCC_FLAGS = os.getenv('GCC_FLAGS', '-O2 -std=c11')
+# Per user, so no other account can plant a binary that the server would run.
+LOCAL_BINARY_CACHE_DIR = os.getenv('LOCAL_BINARY_CACHE_DIR', os.path.join(
+    os.getenv('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'annaforces-binaries'))
+LOCAL_WORKERS = int(os.getenv('LOCAL_WORKERS', '0')) or os.cpu_count() or 1
+LOCAL_TIME_LIMIT = float(os.getenv('LOCAL_TIME_LIMIT', '2'))
+LOCAL_MEMORY_LIMIT_MB = int(os.getenv('LOCAL_MEMORY_LIMIT_MB', '256'))
+LOCAL_OUTPUT_LIMIT_BYTES = int(os.getenv('LOCAL_OUTPUT_LIMIT_BYTES', str(16 * 1024 * 1024)))
+LOCAL_COMPILE_TIMEOUT = float(os.getenv('LOCAL_COMPILE_TIMEOUT', '30'))
+
+PYTHON_LANGUAGES = ('python', 'python3', 'py')
+
+# util-linux prlimit applies the rlimits and execs the program; without it a small Python wrapper does the same.
+PRLIMIT_EXECUTABLE = shutil.which('prlimit')
+_RLIMIT_WRAPPER = (
+    "import os, resource, sys\n"
+    "cpu, memory, output = map(int, sys.argv[1:4])\n"
+    "resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))\n"
+    "resource.setrlimit(resource.RLIMIT_AS, (memory, memory))\n"
+    "resource.setrlimit(resource.RLIMIT_FSIZE, (output, output))\n"
+    "resource.setrlimit(resource.RLIMIT_CORE, (0, 0))\n"
+    "os.execvp(sys.argv[4], sys.argv[4:])\n"
+)
+
+# A process killed by a signal exits with the negated signal number.
+_TIME_LIMIT_RETURNCODES = {-getattr(signal, name) for name in ('SIGXCPU', 'SIGKILL') if hasattr(signal, name)}
+_OUTPUT_LIMIT_RETURNCODES = {-signal.SIGXFSZ} if hasattr(signal, 'SIGXFSZ') else set()
+
+
+def _private_directory(path):
+    """Creates path with mode 0o700 if needed and checks that only the current user can write to it.
+
+    Raises ValueError for a directory owned by someone else or writable by group or others.
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode):
+        raise ValueError(f"Binary cache {path} is not a directory")
+    if hasattr(os, 'getuid') and st.st_uid != os.getuid():
+        raise ValueError(f"Binary cache {path} is not owned by the current user")
+    if st.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        raise ValueError(f"Binary cache {path} is writable by other users")
+    return path
+
+
+def _compiler(language):
+    """Returns (executable, flags) for a compiled language, or None."""
+    if language in ('c++', 'cpp'):
+        return GPP_EXECUTABLE, GPP_FLAGS.split()
+    if language == 'c':
+        return GCC_EXECUTABLE, GCC_FLAGS.split()
+    return None
+
+
+class LocalExecutor:
+    """Runs code in subprocesses on this machine under CPU, memory and output rlimits.
+
+    Compiled languages are built once per distinct source: binaries are cached on
+    disk under a hash of the source, compiler and flags, so every case of a
+    submission, and every resubmission of the same code, reuses the same binary.
+    At most `workers` programs run at once, one per core by default.
+    """
+
+    def __init__(self, cache_dir=None, workers=None, time_limit=None, memory_limit_mb=None, output_limit=None):
+        self.cache_dir = cache_dir or LOCAL_BINARY_CACHE_DIR
+        self.max_in_flight = workers or LOCAL_WORKERS
+        self.time_limit = time_limit or LOCAL_TIME_LIMIT
+        self.memory_limit = (memory_limit_mb or LOCAL_MEMORY_LIMIT_MB) * 1024 * 1024
+        self.output_limit = output_limit or LOCAL_OUTPUT_LIMIT_BYTES
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._programs = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+        self._counters = {'compilations': 0, 'binary_cache_hits': 0}
+        _private_directory(self.cache_dir)
+
+    def capabilities(self):
+        return {'compile': True}
+
+    def compile(self, code, language):
+        """Builds (or finds in the cache) the program for code, returning {"handle": ...} or {"error": ...}."""
+        compiler = _compiler(language)
+        if compiler is None and language not in PYTHON_LANGUAGES:
+            return {'error': f"Unsupported language: {language}"}
+
+        parts = [language, code] + ([compiler[0], *compiler[1]] if compiler else [])
+        key = hashlib.sha256('\0'.join(parts).encode('utf-8')).hexdigest()
+        with self._lock:
+            if key in self._programs:
+                self._counters['binary_cache_hits'] += 1
+                return {'handle': key}
+            key_lock = self._locks.setdefault(key, threading.Lock())
+
+        # Concurrent compiles of the same source wait for the first one instead of building twice.
+        with key_lock:
+            if key not in self._programs:
+                if compiler is None:
+                    argv = self._write_source(key, code)
+                else:
+                    argv, error = self._build(key, code, language, *compiler)
+                    if error is not None:
+                        return {'error': error, 'verdict': 'Compilation Error'}
+                with self._lock:
+                    self._programs[key] = argv
+        return {'handle': key}
+
+    def _write_source(self, key, code):
+        path = os.path.join(self.cache_dir, f"{key}.py")
+        if not os.path.exists(path):
+            self._write_atomic(path, code.encode('utf-8'))
+        return [PYTHON_EXECUTABLE, path]
+
+    def _build(self, key, code, language, executable, flags):
+        binary = os.path.join(self.cache_dir, key)
+        if os.path.exists(binary):
+            with self._lock:
+                self._counters['binary_cache_hits'] += 1
+            return [binary], None
+
+        suffix = '.c' if language == 'c' else '.cpp'
+        with tempfile.TemporaryDirectory(dir=self.cache_dir) as build_dir:
+            source = os.path.join(build_dir, f"main{suffix}")
+            output = os.path.join(build_dir, 'main')
+            with open(source, 'w', encoding='utf-8') as f:
+                f.write(code)
+            try:
+                completed = subprocess.run([executable, *flags, '-o', output, source], capture_output=True,
+                                           timeout=LOCAL_COMPILE_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                return None, "Compilation timed out"
+            except OSError as e:
+                return None, f"Compiler not available: {e}"
+            if completed.returncode != 0:
+                return None, completed.stderr.decode('utf-8', errors='replace').replace(build_dir + os.sep, '')
+            os.replace(output, binary)
+
+        with self._lock:
+            self._counters['compilations'] += 1
+        log_event(logger, 'local_compile', language=language, source_bytes=len(code))
+        return [binary], None
+
+    def _write_atomic(self, path, data):
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _limited_argv(self, argv):
+        """Prefixes argv with a program that sets the sandbox rlimits and then execs it.
+
+        Setting them in a preexec_fn would run Python code between fork and exec in
+        this threaded process, which can deadlock the child.
+        """
+        if resource is None:
+            return argv
+        cpu_seconds = max(1, int(self.time_limit + 0.999))
+        if PRLIMIT_EXECUTABLE:
+            return [PRLIMIT_EXECUTABLE, f"--cpu={cpu_seconds}:{cpu_seconds + 1}", f"--as={self.memory_limit}",
+                    f"--fsize={self.output_limit}", '--core=0', '--'] + list(argv)
+        return [sys.executable, '-c', _RLIMIT_WRAPPER, str(cpu_seconds), str(self.memory_limit),
+                str(self.output_limit)] + list(argv)
+
+    def _run_process(self, argv, stdin):
+        """Runs argv with the sandbox limits, returning (returncode, stdout, stderr, timed_out, output_limited)."""
+        with self._slots, tempfile.TemporaryFile() as stdout_file, tempfile.TemporaryFile() as stderr_file:
+            # Output goes to files, where RLIMIT_FSIZE caps it; a pipe would have no limit.
+            try:
+                process = subprocess.Popen(self._limited_argv(argv), stdin=subprocess.PIPE, stdout=stdout_file,
+                                           stderr=stderr_file, start_new_session=True)
+            except OSError as e:
+                return None, '', str(e), False, False
+            timed_out = False
+            try:
+                process.communicate((stdin or '').encode('utf-8'), timeout=self.time_limit * 2 + 1)
+            except subprocess.TimeoutExpired:
+                timed_out = True
+                if hasattr(os, 'killpg'):
+                    os.killpg(process.pid, signal.SIGKILL)
+                else:
+                    process.kill()
+                process.wait()
+            except BrokenPipeError:
+                # The program exited without reading all of its input.
+                process.wait()
+            # Python and some runtimes ignore SIGXFSZ and fail the write instead, so check the size too.
+            output_limited = os.fstat(stdout_file.fileno()).st_size >= self.output_limit
+            stdout_file.seek(0)
+            stderr_file.seek(0)
+            stdout = stdout_file.read(self.output_limit).decode('utf-8', errors='replace')
+            stderr = stderr_file.read(64 * 1024).decode('utf-8', errors='replace')
+            return process.returncode, stdout, stderr, timed_out, output_limited
+
+    def run(self, handle, stdin):
+        """Runs a program built by compile() against stdin.
+
+        Returns {"stdout", "stderr"} or, when the program failed, {"error", "verdict"}
+        with a verdict such as "Time Limit Exceeded" or "Runtime Error".
+        """
+        argv = self._programs.get(handle)
+        if argv is None:
+            return {'error': 'Unknown program handle'}
+        returncode, stdout, stderr, timed_out, output_limited = self._run_process(argv, stdin)
+        if returncode is None:
+            return {'error': stderr}
+        if timed_out or returncode in _TIME_LIMIT_RETURNCODES:
+            return {'error': stderr or 'Time limit exceeded', 'verdict': 'Time Limit Exceeded'}
+        if output_limited or returncode in _OUTPUT_LIMIT_RETURNCODES:
+            return {'error': 'Output limit exceeded', 'verdict': 'Output Limit Exceeded'}
+        if returncode != 0:
+            return {'error': stderr or f"Exited with code {returncode}", 'verdict': 'Runtime Error'}
+        return {'stdout': stdout, 'stderr': stderr}
+
+    def execute(self, code, language, stdin):
+        compiled = self.compile(code, language)
+        if compiled.get('error'):
+            return compiled
+        return self.run(compiled['handle'], stdin)
+
+    def validate(self, validator_code, user_output, test_input, validator_language='python'):
+        """Runs a validator as `validator <input_file> <user_output_file>`; its stdout is the verdict."""
+        compiled = self.compile(validator_code, validator_language)
+        if compiled.get('error'):
+            return {'success': False, 'err': 'Validation Error', 'stderr': compiled['error']}
+        with tempfile.TemporaryDirectory() as work_dir:
+            input_path = os.path.join(work_dir, 'input.txt')
+            output_path = os.path.join(work_dir, 'output.txt')
+            with open(input_path, 'w', encoding='utf-8') as f:
+                f.write(test_input or '')
+            with open(output_path, 'w', encoding='utf-8') as f:
+                f.write(user_output or '')
+            argv = self._programs[compiled['handle']] + [input_path, output_path]
+            returncode, stdout, stderr, timed_out, _ = self._run_process(argv, '')
+        if returncode != 0 or timed_out:
+            return {'success': False, 'err': 'Validation Error', 'stderr': stderr}
+        return {'success': True, 'stdout': stdout, 'stderr': stderr}
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters, programs=len(self._programs), workers=self.max_in_flight)
+
+
+class FallbackExecutor:
+    """Uses the judge service and runs a request locally whenever the judge service fails it.
+
+    Only the per-case execute/validate protocol is offered, so a program compiled
+    on one backend is never run on the other.
+    """
+
+    def __init__(self, primary, fallback):
+        self.primary = primary
+        self.fallback = fallback
+
+    def capabilities(self):
+        return {}
+
+    def execute(self, code, language, stdin):
+        try:
+            return self.primary.execute(code, language, stdin)
+        except requests.exceptions.RequestException as e:
+            log_event(logger, 'executor_fallback', logging.WARNING, operation='execute', error=str(e))
+            return self.fallback.execute(code, language, stdin)
+
+    def validate(self, validator_code, user_output, test_input, validator_language='python'):
+        try:
+            return self.primary.validate(validator_code, user_output, test_input, validator_language)
+        except requests.exceptions.RequestException as e:
+            log_event(logger, 'executor_fallback', logging.WARNING, operation='validate', error=str(e))
+            return self.fallback.validate(validator_code, user_output, test_input, validator_language)
+
+
+class ConcurrencyLimitedExecutor:
+    """Wraps an executor so that at most `limit` requests run on it at once, across all the threads using it."""
+
+    _LIMITED = ('execute', 'validate', 'execute_batch', 'compile', 'run')
+
+    def __init__(self, executor, limit):
+        self.executor = executor
+        self._slots = threading.BoundedSemaphore(max(1, limit))
+
+    def __getattr__(self, name):
+        attribute = getattr(self.executor, name)
+        if name not in self._LIMITED:
+            return attribute
+
+        def limited(*args, **kwargs):
+            with self._slots:
+                return attribute(*args, **kwargs)
+        return limited
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def create_executor(kind=None):
+    kind = kind or JUDGE_EXECUTOR
+    if kind == 'remote':
+        return get_client()
+    if kind == 'local':
+        return LocalExecutor()
+    if kind == 'fallback':
+        return FallbackExecutor(get_client(), LocalExecutor())
+    raise ValueError(f"Unknown JUDGE_EXECUTOR {kind!r}; expected remote, local or fallback")
+
+
+def get_executor():
+    """Returns the process-wide executor selected by JUDGE_EXECUTOR, creating it on first use."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = create_executor()
+    return _executor
@@ -0,0 +1,33 @@
+"""gunicorn settings for serving the local testing server in production.
+
+Every setting can be overridden with the environment variables below or on the
+gunicorn command line.
+"""
+import os
+import multiprocessing
+
+bind = os.getenv('GUNICORN_BIND', f"0.0.0.0:{os.getenv('PORT', '5001')}")
+# Caches live in each worker, so a few workers with several threads each share them best.
+workers = int(os.getenv('GUNICORN_WORKERS', str(min(multiprocessing.cpu_count(), 4))))
+threads = int(os.getenv('GUNICORN_THREADS', '8'))
+worker_class = 'gthread'
+# Import the app (and warm its caches) once in the master before forking the workers.
+preload_app = os.getenv('GUNICORN_PRELOAD', '1') == '1'
+# Submission event streams stay open while a submission is judged.
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+accesslog = os.getenv('GUNICORN_ACCESS_LOG') or None
+
+
+def post_fork(server, worker):
+    # The log listener thread of the master is not copied into the forked worker.
+    from logging_setup import restart_after_fork
+    restart_after_fork()
+
+
+def post_worker_init(worker):
+    # Only the first worker picks up submissions left unfinished by the previous run,
+    # so they are not judged once per worker. Replacement workers have a higher age.
+    if worker.age == 1:
+        from app import submission_queue
+        submission_queue.resume_pending()
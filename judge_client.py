@@ -0,0 +1,180 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from logging_setup import log_event, capture_payloads
+from metrics import JUDGE_REQUEST_SECONDS, JUDGE_CLIENT_ERRORS
+
+logger = logging.getLogger(__name__)
+
+JUDGE_SERVICE_URL = os.getenv('JUDGE_SERVICE_URL', 'http://localhost:5002')
+JUDGE_EXECUTE_ENDPOINT = os.getenv('JUDGE_EXECUTE_ENDPOINT', '/api/execute')
+JUDGE_VALIDATE_ENDPOINT = os.getenv('JUDGE_VALIDATE_ENDPOINT', '/api/validate')
+JUDGE_CAPABILITIES_ENDPOINT = os.getenv('JUDGE_CAPABILITIES_ENDPOINT', '/api/capabilities')
+JUDGE_BATCH_ENDPOINT = os.getenv('JUDGE_BATCH_ENDPOINT', '/api/execute_batch')
+JUDGE_COMPILE_ENDPOINT = os.getenv('JUDGE_COMPILE_ENDPOINT', '/api/compile')
+JUDGE_RUN_ENDPOINT = os.getenv('JUDGE_RUN_ENDPOINT', '/api/run')
+JUDGE_CAPABILITIES_TTL = float(os.getenv('JUDGE_CAPABILITIES_TTL', '300'))
+JUDGE_HTTP_POOL_SIZE = int(os.getenv('JUDGE_HTTP_POOL_SIZE', '16'))
+JUDGE_CONNECT_TIMEOUT = float(os.getenv('JUDGE_CONNECT_TIMEOUT', '5'))
+JUDGE_READ_TIMEOUT = float(os.getenv('JUDGE_READ_TIMEOUT', '60'))
+JUDGE_MAX_RETRIES = int(os.getenv('JUDGE_MAX_RETRIES', '3'))
+JUDGE_RETRY_BACKOFF = float(os.getenv('JUDGE_RETRY_BACKOFF', '0.5'))
+
+
+def _short_hash(text):
+    return hashlib.sha256((text or '').encode('utf-8')).hexdigest()[:16]
+
+
+class JudgeClient:
+    """Long-lived client for the judge service backed by a pooled keep-alive session."""
+
+    def __init__(self, base_url=None, execute_endpoint=None, validate_endpoint=None,
+                 pool_size=None, connect_timeout=None, read_timeout=None,
+                 max_retries=None, retry_backoff=None):
+        self.base_url = (base_url or JUDGE_SERVICE_URL).rstrip('/')
+        self.execute_endpoint = execute_endpoint or JUDGE_EXECUTE_ENDPOINT
+        self.validate_endpoint = validate_endpoint or JUDGE_VALIDATE_ENDPOINT
+        self.timeout = (
+            connect_timeout if connect_timeout is not None else JUDGE_CONNECT_TIMEOUT,
+            read_timeout if read_timeout is not None else JUDGE_READ_TIMEOUT,
+        )
+        pool_size = pool_size or JUDGE_HTTP_POOL_SIZE
+
+        # Only connection failures and gateway errors are retried. A read timeout
+        # means the judge accepted the run, so repeating it would just multiply the wait.
+        retry = Retry(
+            total=JUDGE_MAX_RETRIES if max_retries is None else max_retries,
+            read=0,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(['POST']),
+            backoff_factor=JUDGE_RETRY_BACKOFF if retry_backoff is None else retry_backoff,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._capabilities = None
+        self._capabilities_checked_at = 0.0
+
+    def _post(self, endpoint, payload, summary):
+        """Posts a JSON payload, logging its sizes and timing (or, when captured, the full payload)."""
+        body = json.dumps(payload)
+        start = time.perf_counter()
+        try:
+            response = self.session.post(f"{self.base_url}{endpoint}", data=body,
+                                         headers={'Content-Type': 'application/json'}, timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            JUDGE_CLIENT_ERRORS.inc(endpoint=endpoint, error=type(e).__name__)
+            log_event(logger, 'judge_request_failed', logging.WARNING, endpoint=endpoint, error=str(e),
+                      duration_ms=round((time.perf_counter() - start) * 1000, 2), request_bytes=len(body), **summary)
+            raise
+        duration = time.perf_counter() - start
+        JUDGE_REQUEST_SECONDS.observe(duration, endpoint=endpoint)
+        if response.status_code >= 400:
+            JUDGE_CLIENT_ERRORS.inc(endpoint=endpoint, error=f"HTTP {response.status_code}")
+        log_event(logger, 'judge_request', endpoint=endpoint, status=response.status_code,
+                  duration_ms=round(duration * 1000, 2),
+                  request_bytes=len(body), response_bytes=len(response.content), **summary)
+        if capture_payloads.get():
+            log_event(logger, 'judge_payload', endpoint=endpoint, request=payload, response=response.text)
+        response.raise_for_status()
+        return response.json()
+
+    def execute(self, code, language, stdin):
+        """Runs code on the judge service with the given stdin."""
+        payload = {
+            'code': code,
+            'language': language,
+            'stdin': stdin
+        }
+        return self._post(self.execute_endpoint, payload, {
+            'language': language, 'code_sha256': _short_hash(code), 'stdin_bytes': len(stdin or '')
+        })
+
+    def validate(self, validator_code, user_output, test_input, validator_language='python'):
+        """Runs a validator script on the judge service against the user's output."""
+        payload = {
+            'validator_code': validator_code,
+            'validator_language': validator_language,
+            'user_output': user_output,
+            'test_input': test_input
+        }
+        return self._post(self.validate_endpoint, payload, {
+            'validator_sha256': _short_hash(validator_code), 'user_output_bytes': len(user_output or '')
+        })
+
+    def capabilities(self):
+        """Returns the features the judge advertises, e.g. {"batch": true, "compile": true}.
+
+        Judges without a capabilities endpoint are treated as supporting only the
+        per-case execute API. The answer is cached for JUDGE_CAPABILITIES_TTL seconds.
+        """
+        now = time.monotonic()
+        if self._capabilities is None or now - self._capabilities_checked_at > JUDGE_CAPABILITIES_TTL:
+            try:
+                response = self.session.get(f"{self.base_url}{JUDGE_CAPABILITIES_ENDPOINT}", timeout=self.timeout)
+                capabilities = response.json() if response.ok else {}
+            except (requests.exceptions.RequestException, ValueError):
+                capabilities = {}
+            self._capabilities = capabilities if isinstance(capabilities, dict) else {}
+            self._capabilities_checked_at = now
+        return self._capabilities
+
+    def execute_batch(self, code, language, stdins):
+        """Compiles the code once and runs it against every stdin, returning one result per stdin."""
+        payload = {
+            'code': code,
+            'language': language,
+            'stdins': stdins
+        }
+        results = self._post(JUDGE_BATCH_ENDPOINT, payload, {
+            'language': language, 'code_sha256': _short_hash(code), 'cases': len(stdins),
+            'stdin_bytes': sum(len(stdin or '') for stdin in stdins)
+        }).get('results', [])
+        if len(results) != len(stdins):
+            JUDGE_CLIENT_ERRORS.inc(endpoint=JUDGE_BATCH_ENDPOINT, error='ResultCountMismatch')
+            raise ValueError(f"Judge service returned {len(results)} results for {len(stdins)} inputs")
+        return results
+
+    def compile(self, code, language):
+        """Compiles the code on the judge service, returning {"handle": ...} or {"error": ...}."""
+        payload = {
+            'code': code,
+            'language': language
+        }
+        return self._post(JUDGE_COMPILE_ENDPOINT, payload, {'language': language, 'code_sha256': _short_hash(code)})
+
+    def run(self, handle, stdin):
+        """Runs a program previously compiled with compile() against the given stdin."""
+        payload = {
+            'handle': handle,
+            'stdin': stdin
+        }
+        return self._post(JUDGE_RUN_ENDPOINT, payload, {'stdin_bytes': len(stdin or '')})
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Returns the process-wide judge client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = JudgeClient()
+    return _client
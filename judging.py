@@ -0,0 +1,264 @@
+import os
+import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import requests
+
+from executors import get_executor
+from checkers import resolve_checker
+from verdict_cache import verdict_cache, code_hash, case_key, case_fingerprint
+from metrics import stage_timer
+
+logger = logging.getLogger(__name__)
+
+# Size of the process-wide pool that talks to the judge service.
+JUDGE_POOL_SIZE = int(os.getenv('JUDGE_POOL_SIZE', '16'))
+# Maximum number of cases a single submission may have in flight at once.
+JUDGE_MAX_CASES_IN_FLIGHT = int(os.getenv('JUDGE_MAX_CASES_IN_FLIGHT', '4'))
+# 'auto' uses batch or compile-then-run execution when the judge advertises it, 'off' never does.
+# 'batch' and 'compile' restrict auto-detection to that one protocol.
+JUDGE_BATCH_MODE = os.getenv('JUDGE_BATCH_MODE', 'auto').lower()
+# Maximum number of cases sent in a single batch execute request.
+JUDGE_BATCH_SIZE = max(1, int(os.getenv('JUDGE_BATCH_SIZE', '50')))
+
+_executor = ThreadPoolExecutor(max_workers=JUDGE_POOL_SIZE, thread_name_prefix='judge')
+
+
+def run_in_order(fn, items, max_in_flight=None, on_result=None, stop_when=None, pool=None):
+    """Runs fn over items on the shared judge pool (or on pool) and returns the results in input order.
+
+    At most max_in_flight items are queued on the pool at any time, so one large
+    submission cannot occupy every judge worker. If given, on_result(index, result)
+    is called from the calling thread as each item finishes. Once stop_when(result)
+    is true no further items are started; items that never ran are left as None.
+    """
+    max_in_flight = max(1, max_in_flight or JUDGE_MAX_CASES_IN_FLIGHT)
+    pool = pool or _executor
+    results = [None] * len(items)
+    pending = {}
+    remaining = iter(enumerate(items))
+    stopped = False
+
+    def submit_next():
+        if stopped:
+            return
+        try:
+            index, item = next(remaining)
+        except StopIteration:
+            return
+        # Run in a copy of the caller's context so log events keep the submission they belong to.
+        pending[pool.submit(contextvars.copy_context().run, fn, item)] = index
+
+    for _ in range(max_in_flight):
+        submit_next()
+
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            index = pending.pop(future)
+            results[index] = future.result()
+            if on_result:
+                on_result(index, results[index])
+            if stop_when and stop_when(results[index]):
+                stopped = True
+            submit_next()
+
+    return results
+
+
+def _check_case(case, checker, client, execute):
+    """Calls execute() to get the program's output for a case and checks it."""
+    try:
+        # 1. Execute user's code
+        with stage_timer('execute', case['name']):
+            execution_result = execute()
+
+        if execution_result.get('error'):
+            status = execution_result.get('verdict', "Execution Error")
+            return {"case": case['name'], "status": status, "stdout": "", "stderr": execution_result['error']}
+
+        user_output = execution_result.get('stdout', '')
+
+        # 2. Validate the output
+        if checker.is_local:
+            with stage_timer('check', case['name']):
+                status = "Accepted" if checker.check(case, user_output) else "Wrong Answer"
+            return {"case": case['name'], "status": status, "stdout": user_output, "stderr": ""}
+
+        with stage_timer('validate', case['name']):
+            validation_result = client.validate(checker.validator_code, user_output, case['input'])
+
+        if validation_result.get('success'):
+            status = validation_result.get('stdout', '').strip()
+        else:
+            status = validation_result.get('err', 'Validation Error')
+        return {"case": case['name'], "status": status, "stdout": user_output, "stderr": validation_result.get('stderr', '')}
+
+    except requests.exceptions.RequestException as e:
+        return {"case": case['name'], "status": "Judge Service Error", "stdout": "", "stderr": str(e)}
+    except Exception as e:
+        return {"case": case['name'], "status": "Internal Server Error", "stdout": "", "stderr": str(e)}
+
+
+def judge_case(case, code, language, problem_dir, client=None, checker=None):
+    """Executes the code against a single case and checks its output."""
+    client = client or get_executor()
+    checker = checker or resolve_checker(problem_dir)
+    return _check_case(case, checker, client, lambda: client.execute(code, language, case['input']))
+
+
+def _failed_results(cases, status, stderr):
+    return [{"case": case['name'], "status": status, "stdout": "", "stderr": stderr} for case in cases]
+
+
+def _is_failure(result):
+    return result['status'] != "Accepted"
+
+
+def _report(results, on_result):
+    if on_result:
+        for index, result in enumerate(results):
+            on_result(index, result)
+    return results
+
+
+def _raise_or_return(output):
+    if isinstance(output, Exception):
+        raise output
+    return output
+
+
+def _judge_batched(cases, code, language, checker, client, max_in_flight, on_result, stop_when, pool):
+    """Sends the code once per chunk of JUDGE_BATCH_SIZE cases to the batch execute endpoint.
+
+    Chunks are sent one after another so a failure can stop the remaining ones.
+    """
+    results = [None] * len(cases)
+    for start in range(0, len(cases), JUDGE_BATCH_SIZE):
+        chunk = cases[start:start + JUDGE_BATCH_SIZE]
+        try:
+            with stage_timer('execute_batch'):
+                outputs = client.execute_batch(code, language, [case['input'] for case in chunk])
+        except Exception as e:
+            # Re-raised by check() below so every case in the chunk gets the usual error entry.
+            outputs = [e] * len(chunk)
+
+        def check(pair):
+            case, output = pair
+            return _check_case(case, checker, client, lambda: _raise_or_return(output))
+
+        chunk_on_result = (lambda index, result, start=start: on_result(start + index, result)) if on_result else None
+        chunk_results = run_in_order(check, list(zip(chunk, outputs)), max_in_flight, chunk_on_result, stop_when, pool)
+        results[start:start + len(chunk)] = chunk_results
+        if stop_when and any(r is not None and stop_when(r) for r in chunk_results):
+            break
+    return results
+
+
+def _judge_compiled(cases, code, language, checker, client, max_in_flight, on_result, stop_when, pool):
+    """Compiles the code once on the judge and runs every case against the returned handle."""
+    try:
+        with stage_timer('compile'):
+            compiled = client.compile(code, language)
+    except requests.exceptions.RequestException as e:
+        return _report(_failed_results(cases, "Judge Service Error", str(e)), on_result)
+    except Exception as e:
+        return _report(_failed_results(cases, "Internal Server Error", str(e)), on_result)
+
+    if compiled.get('error'):
+        return _report(_failed_results(cases, compiled.get('verdict', "Execution Error"), compiled['error']), on_result)
+
+    handle = compiled.get('handle')
+    return run_in_order(lambda case: _check_case(case, checker, client, lambda: client.run(handle, case['input'])),
+                        cases, max_in_flight, on_result, stop_when, pool)
+
+
+def _batch_protocol(client):
+    if JUDGE_BATCH_MODE == 'off':
+        return None
+    capabilities = client.capabilities()
+    if JUDGE_BATCH_MODE in ('auto', 'batch') and capabilities.get('batch'):
+        return 'batch'
+    if JUDGE_BATCH_MODE in ('auto', 'compile') and capabilities.get('compile'):
+        return 'compile'
+    return None
+
+
+def _judge_uncached(cases, code, language, problem_dir, checker, client, max_in_flight, on_result, stop_when,
+                    pool):
+    protocol = _batch_protocol(client) if cases else None
+    if protocol == 'batch':
+        return _judge_batched(cases, code, language, checker, client, max_in_flight, on_result, stop_when, pool)
+    if protocol == 'compile':
+        return _judge_compiled(cases, code, language, checker, client, max_in_flight, on_result, stop_when, pool)
+    return run_in_order(lambda case: judge_case(case, code, language, problem_dir, client, checker), cases,
+                        max_in_flight, on_result, stop_when, pool)
+
+
+def judge_cases(cases, code, language, problem_dir, max_in_flight=None, client=None, on_result=None,
+                stop_on_failure=False, use_cache=True, pool=None):
+    """Judges all cases concurrently, returning one result per case in the original order.
+
+    When the judge advertises batch or compile-then-run support the code is sent
+    (and compiled) once; otherwise every case is executed with its own request.
+    on_result(index, result) is called as soon as each case has been judged.
+
+    With stop_on_failure, no new case is started after the first one that is not
+    Accepted and the cases that never ran are reported as Skipped.
+
+    Cases whose verdict for the same (normalized) code, language, checker and case
+    data is in the verdict cache are not sent to the judge again unless use_cache
+    is False. Fresh verdicts are always added to the cache. Every judged result
+    carries the case_fingerprint() of the case data and checker it was judged with.
+
+    The cases run on the shared judge pool unless another ThreadPoolExecutor is given as pool.
+    """
+    client = client or get_executor()
+    # Executors that bound their own parallelism (one program per core for the local one) set max_in_flight.
+    max_in_flight = max_in_flight or getattr(client, 'max_in_flight', None)
+    try:
+        # Resolved once per submission; the validator source itself is cached across submissions.
+        checker = resolve_checker(problem_dir)
+    except ValueError as e:
+        return _report(_failed_results(cases, "Internal Server Error", str(e)), on_result)
+
+    stop_when = _is_failure if stop_on_failure else None
+    digest = code_hash(code)
+    fingerprints = [case_fingerprint(checker, case) for case in cases]
+    keys = [case_key(digest, language, fingerprint) for fingerprint in fingerprints]
+    results = [None] * len(cases)
+
+    # Cases after a cached failure are skipped in stop_on_failure mode.
+    limit = len(cases)
+    if use_cache:
+        for index, key in enumerate(keys):
+            results[index] = verdict_cache.get(key)
+            if results[index] is not None:
+                results[index]['fingerprint'] = fingerprints[index]
+                if on_result:
+                    on_result(index, results[index])
+                if stop_when and stop_when(results[index]):
+                    limit = index + 1
+                    break
+
+    fresh_indexes = [i for i in range(limit) if results[i] is None]
+
+    def on_fresh_result(index, result):
+        case_index = fresh_indexes[index]
+        result['fingerprint'] = fingerprints[case_index]
+        verdict_cache.put(keys[case_index], result)
+        if on_result:
+            on_result(case_index, result)
+
+    fresh_results = _judge_uncached([cases[i] for i in fresh_indexes], code, language, problem_dir, checker, client,
+                                    max_in_flight, on_fresh_result, stop_when, pool)
+    for case_index, result in zip(fresh_indexes, fresh_results):
+        results[case_index] = result
+
+    for index, result in enumerate(results):
+        if result is None:
+            results[index] = {"case": cases[index]['name'], "status": "Skipped", "stdout": "", "stderr": ""}
+            if on_result:
+                on_result(index, results[index])
+    return results
@@ -0,0 +1,115 @@
+"""Non-blocking, structured logging for the local server.
+
+Records are handed to a queue by the request and judge threads and written by a
+single background listener, so a slow disk never adds latency to judging. The log
+file gets one JSON object per line and is rotated by size.
+"""
+import os
+import sys
+import json
+import queue
+import atexit
+import logging
+import contextvars
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+LOG_FILE = os.getenv('LOG_FILE', 'local_server.log')
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', str(10 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', '5'))
+
+# Set while a submission is judged, so every event can be tied back to it.
+current_submission = contextvars.ContextVar('current_submission', default=None)
+# True while judging a submission that asked for its full judge payloads to be logged.
+capture_payloads = contextvars.ContextVar('capture_payloads', default=False)
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats a record as one JSON object, including the fields passed to log_event()."""
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        entry.update(getattr(record, 'fields', {}))
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Console format: the usual one-line message followed by the event fields as key=value pairs."""
+
+    def format(self, record):
+        line = super().format(record)
+        fields = getattr(record, 'fields', None)
+        if fields:
+            line += ' ' + ' '.join(f"{key}={value}" for key, value in fields.items() if key != 'event')
+        return line
+
+
+def log_event(logger, event, level=logging.INFO, **fields):
+    """Logs a structured event. The current submission id is added automatically."""
+    if not logger.isEnabledFor(level):
+        return
+    submission_id = current_submission.get()
+    if submission_id is not None:
+        fields.setdefault('submission_id', submission_id)
+    logger.log(level, event, extra={'fields': dict(fields, event=event)})
+
+
+@contextmanager
+def submission_context(submission_id, payloads=False):
+    """Tags the events logged inside the block with submission_id and optionally enables payload capture."""
+    submission_token = current_submission.set(submission_id)
+    payloads_token = capture_payloads.set(payloads)
+    try:
+        yield
+    finally:
+        capture_payloads.reset(payloads_token)
+        current_submission.reset(submission_token)
+
+
+def configure_logging():
+    """Routes all logging through a queue to a rotating JSON log file and the console.
+
+    An empty LOG_FILE logs to the console only.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    handlers = []
+    if LOG_FILE:
+        file_handler = RotatingFileHandler(LOG_FILE, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT)
+        file_handler.setFormatter(JsonFormatter())
+        handlers.append(file_handler)
+    console_handler = logging.StreamHandler(sys.stderr)
+    console_handler.setFormatter(TextFormatter('%(asctime)s - %(levelname)s - %(message)s'))
+    handlers.append(console_handler)
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.setLevel(LOG_LEVEL)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(QueueHandler(log_queue))
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+def restart_after_fork():
+    """Starts a fresh listener in a forked worker process; the parent's listener thread does not survive fork()."""
+    global _listener
+    if _listener is not None:
+        atexit.unregister(_listener.stop)
+    _listener = None
+    configure_logging()
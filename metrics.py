@@ -0,0 +1,184 @@
+"""Process-wide metrics, exposed on /metrics in the Prometheus text format.
+
+Metrics are kept per process; with several gunicorn workers every scrape sees
+the worker that answered it.
+"""
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_registry = []
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type_name = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        with self._lock:
+            items = sorted(self._values.items())
+            lines.extend(self._render_samples(items))
+        return lines
+
+
+class Counter(_Metric):
+    type_name = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _render_samples(self, items):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(_Metric):
+    """A value read from a callback at scrape time."""
+    type_name = 'gauge'
+
+    def __init__(self, name, documentation, read):
+        super().__init__(name, documentation)
+        self._read = read
+
+    def render(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge",
+                f"{self.name} {_format_value(self._read())}"]
+
+
+class Histogram(_Metric):
+    type_name = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket counts, then the sum and the count of all observations.
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _render_samples(self, items):
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, [('le', _format_value(bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', '+Inf')])} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+def render():
+    """Returns every registered metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+HTTP_REQUEST_SECONDS = Histogram('http_request_duration_seconds', 'Time spent handling HTTP requests, by route.',
+                                 ('method', 'route', 'status'))
+JUDGE_STAGE_SECONDS = Histogram('judge_stage_duration_seconds', 'Time spent in each stage of judging a submission.',
+                                ('stage',))
+JUDGE_REQUEST_SECONDS = Histogram('judge_client_request_duration_seconds',
+                                  'Time spent waiting on the judge service, by endpoint.', ('endpoint',))
+JUDGE_CLIENT_ERRORS = Counter('judge_client_errors_total', 'Failed judge service requests, by endpoint and error.',
+                              ('endpoint', 'error'))
+CASES_JUDGED = Counter('judge_cases_total', 'Judged test cases, by verdict and whether the verdict cache was used.',
+                       ('status', 'cached'))
+
+
+class TimingBreakdown:
+    """Per-submission totals of the stage timings, overall and per case, in milliseconds."""
+
+    def __init__(self):
+        self.stages = {}
+        self.cases = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds, case=None):
+        milliseconds = seconds * 1000
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + milliseconds
+            if case is not None:
+                case_stages = self.cases.setdefault(case, {})
+                case_stages[stage] = case_stages.get(stage, 0.0) + milliseconds
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'stages': {stage: round(ms, 3) for stage, ms in self.stages.items()},
+                'cases': {case: {stage: round(ms, 3) for stage, ms in stages.items()}
+                          for case, stages in self.cases.items()},
+            }
+
+
+# Set while judging a submission that records its own timing breakdown.
+_breakdown = contextvars.ContextVar('timing_breakdown', default=None)
+
+
+@contextmanager
+def collect_timings(enabled=True):
+    """Collects the stage timings recorded inside the block (including on judge pool threads) into a TimingBreakdown."""
+    breakdown = TimingBreakdown() if enabled else None
+    token = _breakdown.set(breakdown)
+    try:
+        yield breakdown
+    finally:
+        _breakdown.reset(token)
+
+
+@contextmanager
+def stage_timer(stage, case=None):
+    """Times the block as the given judging stage, optionally attributed to one case."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        JUDGE_STAGE_SECONDS.observe(elapsed, stage=stage)
+        breakdown = _breakdown.get()
+        if breakdown is not None:
+            breakdown.add(stage, elapsed, case)
@@ -0,0 +1,134 @@
+import os
+import json
+import threading
+from collections import OrderedDict
+
+# Memory budget for cached problem data, in bytes. 0 disables the cache.
+PROBLEM_CACHE_MAX_BYTES = int(os.getenv('PROBLEM_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+
+
+def file_fingerprint(path):
+    """Cheap change marker for a single file: its mtime and size, or None if it is missing."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def tree_fingerprint(path, depth=2):
+    """Change marker for a directory and its entries down to the given depth.
+
+    Only stats are taken, so revalidating is far cheaper than re-reading the files.
+    """
+    try:
+        entries = sorted(os.scandir(path), key=lambda entry: entry.name)
+    except OSError:
+        return None
+    fingerprint = []
+    for entry in entries:
+        st = entry.stat()
+        if entry.is_dir():
+            fingerprint.append((entry.name, tree_fingerprint(entry.path, depth - 1) if depth > 1 else st.st_mtime_ns))
+        else:
+            fingerprint.append((entry.name, st.st_mtime_ns, st.st_size))
+    return tuple(fingerprint)
+
+
+def estimate_size(value):
+    """Rough number of bytes held by a parsed value, used for the memory budget."""
+    if isinstance(value, (str, bytes)):
+        return len(value) + 50
+    if isinstance(value, dict):
+        return sum(estimate_size(k) + estimate_size(v) for k, v in value.items()) + 100
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_size(v) for v in value) + 60
+    return 30
+
+
+class ProblemCache:
+    """Process-wide LRU cache for parsed problem data with a memory budget.
+
+    Every entry remembers the fingerprint of the files it was built from. A lookup
+    with a different fingerprint reloads the entry, so edits to the DATA tree show up
+    on the next request. Cached values are shared between requests and must not be
+    mutated by callers.
+    """
+
+    def __init__(self, max_bytes=PROBLEM_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'invalidations': 0, 'evictions': 0}
+
+    def get(self, key, fingerprint, load):
+        """Returns the cached value for key if its fingerprint still matches, otherwise load()s it."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == fingerprint:
+                self._entries.move_to_end(key)
+                self._counters['hits'] += 1
+                return entry[1]
+            self._counters['misses'] += 1
+            if entry is not None:
+                self._counters['invalidations'] += 1
+                self._remove(key)
+
+        value = load()
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return value
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (fingerprint, value, size)
+            self._size += size
+            while self._size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._counters['evictions'] += 1
+        return value
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self._size -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self._counters['hits'] + self._counters['misses']
+            return dict(
+                self._counters,
+                entries=len(self._entries),
+                bytes=self._size,
+                max_bytes=self.max_bytes,
+                hit_ratio=self._counters['hits'] / lookups if lookups else 0.0,
+            )
+
+
+problem_cache = ProblemCache()
+
+
+def _read_text(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def parse_json_or_empty(content):
+    return json.loads(content) if content else {}
+
+
+def cached_file(path, parse=None):
+    """Reads (and optionally parses) a file through the problem cache. Missing files read as None."""
+    def load():
+        content = _read_text(path)
+        return parse(content) if parse else content
+    return problem_cache.get(('file', path, parse), file_fingerprint(path), load)
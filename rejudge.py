@@ -0,0 +1,218 @@
+import os
+import uuid
+import time
+import logging
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from checkers import resolve_checker
+from executors import get_executor, ConcurrencyLimitedExecutor
+from judging import judge_cases
+from submission_store import get_store
+from verdict_cache import case_fingerprint, UNCACHEABLE_STATUSES
+from logging_setup import log_event, submission_context
+
+logger = logging.getLogger(__name__)
+
+# Number of submissions a rejudge job works on at the same time.
+REJUDGE_WORKERS = int(os.getenv('REJUDGE_WORKERS', '4'))
+# Maximum number of judge requests in flight at once across all rejudge jobs of the process.
+REJUDGE_CONCURRENCY = int(os.getenv('REJUDGE_CONCURRENCY', '8'))
+
+# Only settled submissions are rejudged; queued and running ones are judged against the current data anyway.
+REJUDGE_STATUSES = ('finished', 'error')
+
+# Shared by every rejudge job. Their cases run on this pool instead of the shared judge pool,
+# so a rejudge never holds the judge threads that live submissions need.
+_judge_pool = ThreadPoolExecutor(max_workers=REJUDGE_CONCURRENCY, thread_name_prefix='rejudge-judge')
+_client = None
+_client_lock = threading.Lock()
+
+
+def _rejudge_client():
+    """The executor all rejudge jobs share, limited to REJUDGE_CONCURRENCY requests at once.
+
+    The compile and batch requests are sent from the job's own workers rather than
+    from _judge_pool, so they are counted against the same limit.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = ConcurrencyLimitedExecutor(get_executor(), REJUDGE_CONCURRENCY)
+        return _client
+
+
+class RejudgeJob:
+    """Rejudges the stored submissions matching a filter after test data or checker changes.
+
+    Every result carries the case_fingerprint() it was judged with, so only the
+    cases whose data or checker changed since (or that are new) are sent to the
+    judge again. Removed cases are dropped and every other verdict is kept; the
+    submission is then saved in place with a "rejudged_at" timestamp. Submissions
+    judged with stop_on_first_failure keep stopping at their first failure; see
+    _judge_until_failure().
+
+    load_problem(problem_id) returns (problem_dir, cases) with the current cases
+    of a problem in judging order, or None when the problem no longer exists.
+    """
+
+    def __init__(self, load_problem, problem_id=None, language=None, since=None, until=None,
+                 workers=None, skip=None):
+        self.id = str(uuid.uuid4())
+        self.filters = {'problem_id': problem_id, 'language': language, 'since': since, 'until': until}
+        self._load_problem = load_problem
+        self._workers = workers or REJUDGE_WORKERS
+        # skip(submission_id) is true for submissions that are being judged right now.
+        self._skip = skip or (lambda submission_id: False)
+        self._lock = threading.Lock()
+        self.status = 'pending'
+        self.counts = {'total': 0, 'done': 0, 'rejudged': 0, 'unchanged': 0, 'skipped': 0, 'errors': 0,
+                       'cases_rerun': 0, 'verdicts_changed': 0}
+        self.started_at = None
+        self.finished_at = None
+        self._start = None
+        self._end = None
+
+    def start(self):
+        """Runs the job on a background thread and returns right away."""
+        threading.Thread(target=self.run, name=f"rejudge-{self.id[:8]}", daemon=True).start()
+        return self
+
+    def run(self, on_progress=None):
+        """Rejudges every matching submission, calling on_progress(progress()) after each one."""
+        submission_ids = get_store().list_ids(statuses=REJUDGE_STATUSES, **self.filters)
+        with self._lock:
+            self.counts['total'] = len(submission_ids)
+            self.status = 'running'
+            self.started_at = datetime.datetime.utcnow().isoformat()
+            self._start = time.perf_counter()
+        log_event(logger, 'rejudge_started', job_id=self.id, submissions=len(submission_ids), **self.filters)
+
+        def rejudge(submission_id):
+            try:
+                outcome = self._rejudge_one(submission_id)
+            except Exception:
+                logger.exception(f"Rejudging submission {submission_id} failed")
+                outcome = 'errors'
+            with self._lock:
+                self.counts[outcome] += 1
+                self.counts['done'] += 1
+            if on_progress:
+                on_progress(self.progress())
+
+        with ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix='rejudge') as pool:
+            list(pool.map(rejudge, submission_ids))
+
+        with self._lock:
+            self.status = 'finished'
+            self.finished_at = datetime.datetime.utcnow().isoformat()
+            self._end = time.perf_counter()
+        progress = self.progress()
+        log_event(logger, 'rejudge_finished', job_id=self.id, **{k: v for k, v in progress.items() if k != 'filters'})
+        return progress
+
+    def _rejudge_one(self, submission_id):
+        if self._skip(submission_id):
+            return 'skipped'
+        submission = get_store().load(submission_id)
+        if submission is None or submission.get('status') not in REJUDGE_STATUSES:
+            return 'skipped'
+        problem = self._load_problem(submission['problem_id'])
+        if problem is None:
+            return 'errors'
+        problem_dir, cases = problem
+        try:
+            checker = resolve_checker(problem_dir)
+        except ValueError:
+            return 'errors'
+
+        previous = {r['case']: r for r in submission.get('results', [])}
+        kept = [self._still_valid(previous.get(case['name']), checker, case) for case in cases]
+        stop_on_failure = submission.get('stop_on_first_failure', False)
+        results = [previous.get(case['name']) if keep else None for case, keep in zip(cases, kept)]
+
+        def judge(indexes):
+            with submission_context(submission_id):
+                fresh = judge_cases([cases[i] for i in indexes], submission['code'], submission['language'],
+                                    problem_dir, client=_rejudge_client(), stop_on_failure=stop_on_failure,
+                                    pool=_judge_pool)
+            for index, result in zip(indexes, fresh):
+                results[index] = result
+            return sum(1 for result in fresh if result['status'] != 'Skipped')
+
+        if stop_on_failure:
+            judged = self._judge_until_failure(cases, kept, results, judge)
+        else:
+            rerun_indexes = [i for i, keep in enumerate(kept) if not keep]
+            judged = judge(rerun_indexes) if rerun_indexes else 0
+        if results == submission.get('results'):
+            return 'unchanged'
+        changed = sum(1 for case, result in zip(cases, results)
+                      if (previous.get(case['name']) or {}).get('status') != result['status'])
+
+        submission['results'] = results
+        submission['status'] = 'finished'
+        submission.pop('error', None)
+        submission['rejudged_at'] = datetime.datetime.utcnow().isoformat()
+        get_store().save(submission)
+        with self._lock:
+            self.counts['cases_rerun'] += judged
+            self.counts['verdicts_changed'] += changed
+        return 'rejudged'
+
+    @staticmethod
+    def _still_valid(result, checker, case):
+        """Whether a stored result was judged against the current case data and checker and can be kept."""
+        return (result is not None and result.get('status') not in UNCACHEABLE_STATUSES
+                and result.get('fingerprint') == case_fingerprint(checker, case))
+
+    @staticmethod
+    def _judge_until_failure(cases, kept, results, judge):
+        """Rejudges a stop-on-first-failure submission in case order.
+
+        Runs of cases that need judging are judged up to the first failure and kept
+        verdicts are walked over. After the first failure, the cases that would need
+        judging are Skipped, so a case skipped before is only judged again once no
+        earlier case fails any more. Returns the number of cases judged.
+        """
+        judged = 0
+        index = 0
+        while index < len(cases):
+            if kept[index]:
+                failed = results[index]['status'] != 'Accepted'
+                index += 1
+            else:
+                end = index
+                while end < len(cases) and not kept[end]:
+                    end += 1
+                judged += judge(list(range(index, end)))
+                failed = any(results[i]['status'] not in ('Accepted', 'Skipped') for i in range(index, end))
+                index = end
+            if failed:
+                for rest in range(index, len(cases)):
+                    if not kept[rest]:
+                        results[rest] = {"case": cases[rest]['name'], "status": "Skipped", "stdout": "", "stderr": ""}
+                break
+        return judged
+
+    def progress(self):
+        """The job's counters, elapsed time and throughput so far."""
+        with self._lock:
+            counts = dict(self.counts)
+            if self._start is None:
+                elapsed = 0.0
+            else:
+                elapsed = (self._end or time.perf_counter()) - self._start
+            progress = {
+                'id': self.id,
+                'status': self.status,
+                'filters': {key: value for key, value in self.filters.items() if value is not None},
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+            }
+        progress.update(counts)
+        progress['elapsed_s'] = round(elapsed, 3)
+        progress['submissions_per_s'] = round(counts['done'] / elapsed, 3) if elapsed else 0.0
+        progress['cases_per_s'] = round(counts['cases_rerun'] / elapsed, 3) if elapsed else 0.0
+        return progress
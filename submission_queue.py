@@ -0,0 +1,82 @@
+import os
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from submission_store import get_store
+from metrics import JUDGE_STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Number of submissions judged at the same time.
+SUBMISSION_WORKERS = int(os.getenv('SUBMISSION_WORKERS', '2'))
+
+PENDING_STATUSES = ('queued', 'running')
+
+
+class SubmissionQueue:
+    """Judges submissions on a background worker pool.
+
+    The stored submission doubles as the persistent queue entry: it is saved with
+    status "queued" before the job is scheduled and saved again as every case is
+    judged, so resume_pending() can pick unfinished work back up after a restart.
+    """
+
+    def __init__(self, judge, workers=None):
+        self._judge = judge
+        self._executor = ThreadPoolExecutor(max_workers=workers or SUBMISSION_WORKERS, thread_name_prefix='submission')
+        self._active = {}
+        self._lock = threading.Lock()
+        self._progress = threading.Condition()
+
+    def enqueue(self, submission):
+        submission['status'] = 'queued'
+        get_store().save(submission)
+        with self._lock:
+            self._active[submission['id']] = submission
+        self._executor.submit(self._run, submission, time.monotonic())
+
+    def _run(self, submission, enqueued_at):
+        JUDGE_STAGE_SECONDS.observe(time.monotonic() - enqueued_at, stage='queue_wait')
+        try:
+            self._judge(submission)
+        except Exception as e:
+            logger.exception(f"Judging submission {submission['id']} failed")
+            submission['status'] = 'error'
+            submission['error'] = str(e)
+            get_store().save(submission)
+        finally:
+            with self._lock:
+                self._active.pop(submission['id'], None)
+            self.notify_progress()
+
+    def get(self, submission_id):
+        """Returns the live record of a queued or running submission, or None."""
+        with self._lock:
+            return self._active.get(submission_id)
+
+    def active_count(self):
+        """Number of submissions queued or being judged by this process."""
+        with self._lock:
+            return len(self._active)
+
+    def notify_progress(self):
+        """Wakes up everyone waiting in wait_for_progress(); called after every judged case."""
+        with self._progress:
+            self._progress.notify_all()
+
+    def wait_for_progress(self, timeout):
+        with self._progress:
+            self._progress.wait(timeout)
+
+    def resume_pending(self):
+        """Re-enqueues stored submissions that were still queued or running when the server stopped."""
+        resumed = 0
+        for submission in list(get_store().iter_by_status(PENDING_STATUSES)):
+            if submission.get('id') not in self._active:
+                self.enqueue(submission)
+                resumed += 1
+        if resumed:
+            logger.info(f"Resumed {resumed} unfinished submissions")
+        return resumed
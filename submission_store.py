@@ -0,0 +1,344 @@
+import os
+import gzip
+import json
+import sqlite3
+import hashlib
+import threading
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+SUBMISSIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'submissions')
+
+# 'sqlite' (default) keeps submissions in an indexed database, 'json' keeps one file per submission.
+SUBMISSION_STORE = os.getenv('SUBMISSION_STORE', 'sqlite').lower()
+SUBMISSION_DB_PATH = os.getenv('SUBMISSION_DB_PATH', os.path.join(SUBMISSIONS_DIR, 'submissions.db'))
+
+SUMMARY_FIELDS = ('id', 'problem_id', 'language', 'timestamp', 'status')
+
+# Per-case stdout and stderr beyond this many bytes are truncated when stored; the hash of the full text is kept.
+SUBMISSION_OUTPUT_LIMIT_BYTES = int(os.getenv('SUBMISSION_OUTPUT_LIMIT_BYTES', str(64 * 1024)))
+# How the SQLite store compresses submissions and code: 'zstd' (gzip if zstandard is not installed), 'gzip' or 'none'.
+SUBMISSION_COMPRESSION = os.getenv('SUBMISSION_COMPRESSION', 'zstd').lower()
+
+_ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+_GZIP_MAGIC = b'\x1f\x8b'
+
+
+def _summary(submission_data):
+    return {field: submission_data.get(field) for field in SUMMARY_FIELDS}
+
+
+def _truncate_output(result, field, limit):
+    text = result.get(field)
+    # A character is at most 4 bytes, so short outputs are accepted without encoding them.
+    if not text or len(text) * 4 <= limit or result.get(f"{field}_truncated"):
+        return result
+    data = text.encode('utf-8')
+    if len(data) <= limit:
+        return result
+    return dict(result, **{
+        field: data[:limit].decode('utf-8', errors='ignore'),
+        f"{field}_truncated": True,
+        f"{field}_size": len(data),
+        f"{field}_sha256": hashlib.sha256(data).hexdigest(),
+    })
+
+
+def compact_results(results, limit=SUBMISSION_OUTPUT_LIMIT_BYTES):
+    """Returns the case results with every stdout and stderr longer than limit bytes cut down to limit.
+
+    A truncated field gets <field>_truncated, the <field>_size and the <field>_sha256
+    of the full output next to it. Results that need no change are returned as they are.
+    """
+    compacted = []
+    for result in results:
+        for field in ('stdout', 'stderr'):
+            result = _truncate_output(result, field, limit)
+        compacted.append(result)
+    return compacted
+
+
+def _stored_record(submission_data):
+    if not submission_data.get('results'):
+        return submission_data
+    return dict(submission_data, results=compact_results(submission_data['results']))
+
+
+def _compress(data, codec=SUBMISSION_COMPRESSION):
+    if codec == 'zstd' and zstandard is not None:
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    if codec in ('zstd', 'gzip'):
+        return gzip.compress(data, compresslevel=6)
+    return data
+
+
+def _decompress(data):
+    """Reverses _compress(); the codec is recognized by its magic bytes, so stores can mix them."""
+    if isinstance(data, str):
+        return data
+    if data.startswith(_ZSTD_MAGIC):
+        if zstandard is None:
+            raise RuntimeError('This submission is zstd compressed; install the zstandard package to read it')
+        return zstandard.ZstdDecompressor().decompress(data)
+    if data.startswith(_GZIP_MAGIC):
+        return gzip.decompress(data)
+    return data
+
+
+class JsonFileSubmissionStore:
+    """Stores every submission as submissions/<id>.json, with long outputs truncated. Listing reads every file."""
+
+    def __init__(self, directory=SUBMISSIONS_DIR):
+        self.directory = directory
+
+    def _path(self, submission_id):
+        return os.path.join(self.directory, f"{submission_id}.json")
+
+    def save(self, submission_data):
+        """Writes a submission atomically so a crash mid-write never leaves a truncated file."""
+        os.makedirs(self.directory, exist_ok=True)
+        submission_filepath = self._path(submission_data['id'])
+        tmp_filepath = f"{submission_filepath}.tmp"
+        with open(tmp_filepath, 'w') as f:
+            json.dump(_stored_record(submission_data), f, separators=(',', ':'))
+        os.replace(tmp_filepath, submission_filepath)
+
+    def save_many(self, submissions):
+        for submission_data in submissions:
+            self.save(submission_data)
+
+    def load(self, submission_id, with_code=True):
+        """Returns the stored submission, or None if it does not exist.
+
+        Raises json.JSONDecodeError if the file is not valid JSON.
+        """
+        submission_filepath = self._path(submission_id)
+        if not os.path.exists(submission_filepath):
+            return None
+        with open(submission_filepath, 'r') as f:
+            return json.load(f)
+
+    def iter_all(self):
+        """Yields every readable stored submission."""
+        if not os.path.isdir(self.directory):
+            return
+        for filename in os.listdir(self.directory):
+            if filename.endswith('.json'):
+                with open(os.path.join(self.directory, filename), 'r') as f:
+                    try:
+                        yield json.load(f)
+                    except json.JSONDecodeError:
+                        continue
+
+    def iter_by_status(self, statuses):
+        return (s for s in self.iter_all() if s.get('status') in statuses)
+
+    def list_ids(self, problem_id=None, language=None, since=None, until=None, statuses=None):
+        """Returns the ids of the matching submissions, oldest first. since/until bound the ISO timestamp."""
+        matching = [
+            s for s in self.iter_all()
+            if (problem_id is None or s.get('problem_id') == problem_id)
+            and (language is None or s.get('language') == language)
+            and (since is None or (s.get('timestamp') or '') >= since)
+            and (until is None or (s.get('timestamp') or '') < until)
+            and (statuses is None or s.get('status') in statuses)
+        ]
+        matching.sort(key=lambda x: x.get('timestamp') or '')
+        return [s['id'] for s in matching if s.get('id')]
+
+    def list_summaries(self, problem_id=None, language=None, offset=0, limit=None):
+        """Returns (summaries, total) for the matching submissions, newest first."""
+        summaries = [
+            _summary(s) for s in self.iter_all()
+            if (problem_id is None or s.get('problem_id') == problem_id)
+            and (language is None or s.get('language') == language)
+        ]
+        summaries.sort(key=lambda x: x.get('timestamp') or '', reverse=True)
+        end = None if limit is None else offset + limit
+        return summaries[offset:end], len(summaries)
+
+
+class SqliteSubmissionStore:
+    """Stores submissions in SQLite with indexes for the listing queries.
+
+    The full submission is kept as a compressed JSON document next to the indexed
+    columns, so listing never has to decode code or per-case output. Long outputs
+    are truncated (see compact_results()) and the code is stored once per distinct
+    source in code_blobs, keyed by its sha256. Documents written as plain JSON by
+    earlier versions are still read.
+    """
+
+    def __init__(self, path=SUBMISSION_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.created = not os.path.exists(path)
+        with self._connect() as conn:
+            conn.executescript('''
+                CREATE TABLE IF NOT EXISTS submissions (
+                    id TEXT PRIMARY KEY,
+                    problem_id TEXT,
+                    language TEXT,
+                    timestamp TEXT,
+                    status TEXT,
+                    data TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_submissions_timestamp ON submissions (timestamp);
+                CREATE INDEX IF NOT EXISTS idx_submissions_problem ON submissions (problem_id, timestamp);
+                CREATE INDEX IF NOT EXISTS idx_submissions_language ON submissions (language, timestamp);
+                CREATE INDEX IF NOT EXISTS idx_submissions_status ON submissions (status);
+                CREATE TABLE IF NOT EXISTS code_blobs (
+                    hash TEXT PRIMARY KEY,
+                    data BLOB NOT NULL
+                );
+            ''')
+
+    def _connect(self):
+        # sqlite3 connections cannot be shared between threads, so each thread gets its own.
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _encode(self, conn, submission_data):
+        record = _stored_record(submission_data)
+        code = record.get('code')
+        if code is not None:
+            code_hash = hashlib.sha256(code.encode('utf-8')).hexdigest()
+            # The code is saved again with every judged case; only compress it the first time.
+            if conn.execute('SELECT 1 FROM code_blobs WHERE hash = ?', (code_hash,)).fetchone() is None:
+                conn.execute('INSERT OR IGNORE INTO code_blobs (hash, data) VALUES (?, ?)',
+                             (code_hash, _compress(code.encode('utf-8'))))
+            record = {key: value for key, value in record.items() if key != 'code'}
+            record['code_sha256'] = code_hash
+        return _compress(json.dumps(record, separators=(',', ':')).encode('utf-8'))
+
+    def _decode(self, data, with_code=True):
+        record = json.loads(_decompress(data))
+        code_hash = record.pop('code_sha256', None)
+        if code_hash is not None and with_code:
+            row = self._connect().execute('SELECT data FROM code_blobs WHERE hash = ?', (code_hash,)).fetchone()
+            record['code'] = _decompress(row[0]).decode('utf-8') if row else None
+        return record
+
+    def save(self, submission_data):
+        self.save_many([submission_data])
+
+    def save_many(self, submissions):
+        with self._connect() as conn:
+            rows = [
+                (s['id'], s.get('problem_id'), s.get('language'), s.get('timestamp'), s.get('status'),
+                 self._encode(conn, s))
+                for s in submissions
+            ]
+            conn.executemany('INSERT OR REPLACE INTO submissions (id, problem_id, language, timestamp, status, data) '
+                             'VALUES (?, ?, ?, ?, ?, ?)', rows)
+
+    def load(self, submission_id, with_code=True):
+        """Returns the stored submission, or None if it does not exist. with_code=False skips reading the code."""
+        row = self._connect().execute('SELECT data FROM submissions WHERE id = ?', (submission_id,)).fetchone()
+        return self._decode(row[0], with_code) if row else None
+
+    def iter_all(self):
+        for (data,) in self._connect().execute('SELECT data FROM submissions'):
+            yield self._decode(data)
+
+    def iter_by_status(self, statuses):
+        placeholders = ', '.join('?' for _ in statuses)
+        query = f'SELECT data FROM submissions WHERE status IN ({placeholders})'
+        for (data,) in self._connect().execute(query, tuple(statuses)):
+            yield self._decode(data)
+
+    def list_ids(self, problem_id=None, language=None, since=None, until=None, statuses=None):
+        """Returns the ids of the matching submissions, oldest first. since/until bound the ISO timestamp."""
+        conditions = []
+        params = []
+        for column, value in (('problem_id', problem_id), ('language', language)):
+            if value is not None:
+                conditions.append(f'{column} = ?')
+                params.append(value)
+        if since is not None:
+            conditions.append('timestamp >= ?')
+            params.append(since)
+        if until is not None:
+            conditions.append('timestamp < ?')
+            params.append(until)
+        if statuses is not None:
+            conditions.append(f"status IN ({', '.join('?' for _ in statuses)})")
+            params.extend(statuses)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+        rows = self._connect().execute(f'SELECT id FROM submissions{where} ORDER BY timestamp', params).fetchall()
+        return [row[0] for row in rows]
+
+    def list_summaries(self, problem_id=None, language=None, offset=0, limit=None):
+        """Returns (summaries, total) for the matching submissions, newest first."""
+        conditions = []
+        params = []
+        if problem_id is not None:
+            conditions.append('problem_id = ?')
+            params.append(problem_id)
+        if language is not None:
+            conditions.append('language = ?')
+            params.append(language)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+
+        conn = self._connect()
+        total = conn.execute(f'SELECT COUNT(*) FROM submissions{where}', params).fetchone()[0]
+        query = (f"SELECT {', '.join(SUMMARY_FIELDS)} FROM submissions{where} "
+                 f"ORDER BY timestamp DESC LIMIT ? OFFSET ?")
+        rows = conn.execute(query, params + [-1 if limit is None else limit, offset]).fetchall()
+        return [dict(zip(SUMMARY_FIELDS, row)) for row in rows], total
+
+
+def import_json_submissions(store, directory=SUBMISSIONS_DIR, batch_size=500):
+    """Copies submissions/<id>.json files into store, returning how many were imported."""
+    source = JsonFileSubmissionStore(directory)
+    imported = 0
+    batch = []
+    for submission_data in source.iter_all():
+        if not submission_data.get('id'):
+            continue
+        # Files written before the submission queue existed were always fully judged.
+        submission_data.setdefault('status', 'finished')
+        batch.append(submission_data)
+        if len(batch) >= batch_size:
+            store.save_many(batch)
+            imported += len(batch)
+            batch = []
+    if batch:
+        store.save_many(batch)
+        imported += len(batch)
+    return imported
+
+
+def create_store(kind=SUBMISSION_STORE):
+    """Builds the configured store. A new SQLite database first imports the existing JSON files."""
+    if kind == 'json':
+        return JsonFileSubmissionStore()
+    if kind == 'sqlite':
+        store = SqliteSubmissionStore()
+        if store.created:
+            import_json_submissions(store)
+        return store
+    raise ValueError(f"Unknown SUBMISSION_STORE {kind!r}")
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Returns the process-wide submission store, creating it on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = create_store()
+    return _store
@@ -0,0 +1,97 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
+from problem_cache import estimate_size
+
+# Memory budget for cached case verdicts, in bytes. 0 disables the cache.
+VERDICT_CACHE_MAX_BYTES = int(os.getenv('VERDICT_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+
+# Verdicts that say something about the infrastructure (or, for time limits, its load) rather than the code are
+# never reused.
+UNCACHEABLE_STATUSES = ('Judge Service Error', 'Internal Server Error', 'Time Limit Exceeded', 'Skipped', 'Pending')
+
+
+def _sha256(text):
+    return hashlib.sha256((text or '').encode('utf-8')).hexdigest()
+
+
+def normalize_code(code):
+    """Normalizes CRLF line endings and the newlines at the end of the file, so re-saved copies hash the same.
+
+    Nothing else is touched: whitespace inside a string literal (a triple-quoted
+    string, a raw string) can change what the program prints.
+    """
+    return code.replace('\r\n', '\n').rstrip('\n')
+
+
+def code_hash(code):
+    return _sha256(normalize_code(code))
+
+
+def case_fingerprint(checker, case):
+    """Identifies what a case is judged against: its input, its expected output and the checker.
+
+    Stored with every result, so a rejudge can tell which cases changed since. Uses the
+    hashes computed when the cases were loaded, when present.
+    """
+    parts = (checker.fingerprint, case.get('input_sha256') or _sha256(case['input']),
+             case.get('output_sha256') or _sha256(case['output']))
+    return hashlib.sha256('\0'.join(parts).encode('utf-8')).hexdigest()
+
+
+def case_key(code_digest, language, fingerprint):
+    """Content address of one case verdict: the code, the language and the case_fingerprint()."""
+    return hashlib.sha256('\0'.join((code_digest, language, fingerprint)).encode('utf-8')).hexdigest()
+
+
+class VerdictCache:
+    """Bounded LRU map from case_key() to the result judged for it."""
+
+    def __init__(self, max_bytes=VERDICT_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters['hits'] += 1
+            return dict(entry[0], cached=True)
+
+    def put(self, key, result):
+        if result.get('status') in UNCACHEABLE_STATUSES:
+            return
+        result = {k: v for k, v in result.items() if k != 'cached'}
+        size = estimate_size(result)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous[1]
+            self._entries[key] = (result, size)
+            self._size += size
+            while self._size > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+                self._counters['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters, entries=len(self._entries), bytes=self._size, max_bytes=self.max_bytes)
+
+
+verdict_cache = VerdictCache()
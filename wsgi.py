@@ -0,0 +1,11 @@
+"""WSGI entry point for production servers.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+The caches are warmed before the server accepts connections. With preload_app
+(the default in gunicorn.conf.py) this happens once in the master process and the
+workers inherit the warm caches when they are forked.
+"""
+from app import app, warm_up
+
+warm_up()